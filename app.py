@@ -1,26 +1,177 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory
+from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify, Response, stream_with_context, make_response, abort
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
 import os
+import gzip
+import shutil
+import time
+import hashlib
+import mimetypes
+import logging
+import tempfile
 import xml.etree.ElementTree as ET
 from models.invernadero import Invernadero
 from models.dron import Dron
-from models.planta import Planta
 from models.plan import PlanRiego
 from models.simulador import Simulador
 from models.tda import ListaEnlazada
+from models.cache import CacheSimulaciones
+from models.paralelo import simular_en_paralelo
+from models.salida import escribir_salida_xml, iter_instrucciones_ndjson, iter_instrucciones_csv
+from models.trabajos import ColaTrabajos
+from models.metricas import logger, metricas
+from models.graficos import RenderizadorGraficos
+from models.instantanea import InstantaneaConfiguracion
+from models.fusion import fusionar_configuracion
+from models.perfilador import Perfilador
 
 app = Flask(__name__)
 app.secret_key = 'ipc2_guateriegos'
+app.config.setdefault('CACHE_SIMULACIONES', 32)
+app.config.setdefault('TRABAJADORES_SALIDA', None)  # None = un proceso por CPU
+app.config.setdefault('TRABAJADORES_SIMULACION', 2)
+app.config.setdefault('GRAFICOS_MOTOR', 'auto')  # 'graphviz', 'python' o 'auto'
+app.config.setdefault('GRAFICOS_CACHE', 2048)
+app.config.setdefault('GRAFICOS_LOTE', 25)  # tiempos que se renderizan juntos en /graph
+app.config.setdefault('REPORTE_FILAS', 1000)  # instrucciones por página en reportes y en /simulate
+app.config.setdefault('COMPRESION_MINIMA', 4096)  # bytes desde los que se comprime con gzip
+app.config.setdefault('INSTANTANEA', os.path.join('data', 'configuracion.pkl'))  # None = solo en memoria
+app.config.setdefault('PERFILAR', False)  # perfilar todas las solicitudes con cProfile
+app.config.setdefault('PERFILAR_CABECERA', None)  # o solo las que traen esta cabecera (p. ej. 'X-Perfilar'); None = nunca
+app.config.setdefault('PERFILES_MAX', 20)  # archivos .pstats que se conservan
+app.config.setdefault('PERFILES_CARPETA', 'perfiles')  # fuera de las carpetas que se sirven
+app.config.setdefault('LOG_LEVEL', os.environ.get('GUATERIEGOS_LOG_LEVEL', 'INFO'))
+
+logging.basicConfig(level=app.config['LOG_LEVEL'],
+                    format='%(asctime)s %(levelname)s %(name)s: %(message)s')
 
 UPLOAD_FOLDER = 'uploads'
 OUTPUT_FOLDER = 'outputs'
 REPORTS_FOLDER = 'reports'
+COMPRIMIBLES = ('text/html', 'application/xml', 'text/xml', 'text/csv', 'application/x-ndjson')
+MARCA_REPORTE = "<!-- contenido {} -->\n"
+AUXILIARES = ('.gz', '.huella', '.tmp')  # copias y huellas junto a los archivos, no se sirven
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 os.makedirs(REPORTS_FOLDER, exist_ok=True)
 
 invernaderos = ListaEnlazada()
+cache_simulaciones = CacheSimulaciones(app.config['CACHE_SIMULACIONES'])
+renderizador = RenderizadorGraficos(app.config['GRAFICOS_CACHE'], app.config['GRAFICOS_MOTOR'])
+cola_trabajos = ColaTrabajos(cache_simulaciones, app.config['TRABAJADORES_SIMULACION'])
+instantanea = InstantaneaConfiguracion(app.config['INSTANTANEA']) if app.config['INSTANTANEA'] else None
+perfilador = Perfilador(app.config['PERFILES_CARPETA'], app.config['PERFILAR'],
+                        app.config['PERFILAR_CABECERA'], app.config['PERFILES_MAX'])
+perfilador.instalar(app)
+
+_huella_configuracion = None
+cargada_en = time.time()
+
+def reemplazar_configuracion(nuevos, descartadas=None):
+    # descartadas: claves de simulación que dejaron de usarse; None = todas.
+    # Las caches se direccionan por contenido, así que lo demás sigue valiendo
+    global invernaderos, _huella_configuracion, cargada_en
+    invernaderos = nuevos
+    _huella_configuracion = None
+    cargada_en = time.time()
+    if descartadas is None:
+        cache_simulaciones.limpiar()
+        renderizador.cache.limpiar()
+    else:
+        cache_simulaciones.descartar(lambda clave: clave in descartadas)
+        renderizador.cache.descartar(lambda clave: clave[0] in descartadas)
+
+def huella_configuracion():
+    # Hash de todo lo que define la salida: nombres y contenido de cada plan
+    global _huella_configuracion
+    if _huella_configuracion is None:
+        h = hashlib.sha256()
+        for inv in invernaderos:
+            h.update(f"I{inv.nombre};".encode('utf-8'))
+            for plan in inv.planes:
+                h.update(f"P{plan.nombre}|{CacheSimulaciones.clave(inv, plan)};".encode('utf-8'))
+        _huella_configuracion = h.hexdigest()
+    return _huella_configuracion
+
+@app.before_request
+def sincronizar_configuracion():
+    # La configuración que subió este u otro proceso se lee de la copia en disco
+    if instantanea:
+        nuevos = instantanea.cargar_si_cambio()
+        if nuevos is not None:
+            reemplazar_configuracion(nuevos)
+
+@app.after_request
+def comprimir_respuesta(respuesta):
+    # Páginas generadas grandes (HTML, XML, CSV) van con gzip si el cliente lo acepta;
+    # los archivos se comprimen aparte en enviar_archivo
+    if (respuesta.status_code != 200 or respuesta.direct_passthrough or respuesta.is_streamed
+            or 'Content-Encoding' in respuesta.headers or respuesta.mimetype not in COMPRIMIBLES
+            or request.accept_encodings['gzip'] <= 0):
+        return respuesta
+    datos = respuesta.get_data()
+    if len(datos) < app.config['COMPRESION_MINIMA']:
+        return respuesta
+    respuesta.set_data(gzip.compress(datos, compresslevel=6))
+    respuesta.headers['Content-Encoding'] = 'gzip'
+    respuesta.vary.add('Accept-Encoding')
+    etag, debil = respuesta.get_etag()
+    if etag:
+        respuesta.set_etag(f"{etag}-gzip", debil)
+    return respuesta
+
+def enviar_archivo(carpeta, nombre, huella=None):
+    """Envía un archivo con ETag (la huella de su contenido si se conoce) y
+    Last-Modified, responde 304 si el cliente ya lo tiene y usa una copia
+    .gz guardada junto al archivo si acepta gzip. Las copias .gz, las
+    huellas y los temporales no se sirven como archivos."""
+    ruta = safe_join(os.path.abspath(carpeta), nombre)
+    if ruta is None or nombre.endswith(AUXILIARES) or not os.path.isfile(ruta):
+        abort(404)
+    mimetype = mimetypes.guess_type(nombre)[0] or 'application/octet-stream'
+    enviar, etag = ruta, huella or True
+    if (mimetype in COMPRIMIBLES and os.path.getsize(ruta) >= app.config['COMPRESION_MINIMA']
+            and request.accept_encodings['gzip'] > 0):
+        enviar = comprimir_en_disco(ruta)
+        etag = f"{huella}-gzip" if huella else True
+    respuesta = send_file(enviar, mimetype=mimetype, etag=etag, conditional=True,
+                          last_modified=os.path.getmtime(ruta))
+    if enviar != ruta:
+        respuesta.headers['Content-Encoding'] = 'gzip'
+    respuesta.vary.add('Accept-Encoding')
+    return respuesta
+
+def comprimir_en_disco(ruta):
+    # La copia .gz se rehace solo si el archivo es más nuevo que ella
+    ruta_gz = ruta + '.gz'
+    try:
+        if os.stat(ruta_gz).st_mtime_ns >= os.stat(ruta).st_mtime_ns:
+            return ruta_gz
+    except FileNotFoundError:
+        pass
+    with metricas.medir('compresion'):
+        descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+        with open(ruta, 'rb') as origen, os.fdopen(descriptor, 'wb') as destino:
+            with gzip.GzipFile(fileobj=destino, mode='wb', compresslevel=6) as comprimido:
+                shutil.copyfileobj(origen, comprimido)
+        os.replace(temporal, ruta_gz)
+    return ruta_gz
+
+def leer_huella(ruta):
+    # Huella que acompaña al archivo: 1a línea de un reporte o archivo .huella
+    try:
+        if ruta.endswith('.html'):
+            with open(ruta, encoding='utf-8') as f:
+                linea = f.readline()
+            prefijo, sufijo = MARCA_REPORTE.split('{}')
+            if linea.startswith(prefijo) and linea.endswith(sufijo):
+                return linea[len(prefijo):-len(sufijo)]
+            return None
+        with open(ruta + '.huella', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
 
 @app.route('/')
 def index():
@@ -28,16 +179,33 @@ def index():
 
 @app.route('/upload', methods=['GET', 'POST'])
 def upload_file():
-    global invernaderos
     if request.method == 'POST':
         file = request.files.get('file')
         if file and file.filename.endswith('.xml'):
             filename = secure_filename(file.filename)
             filepath = os.path.join(UPLOAD_FOLDER, filename)
             file.save(filepath)
+            # Fusionar: solo se agregan o reemplazan los invernaderos y planes del archivo
+            fusionar = request.form.get('modo') == 'fusionar' and len(invernaderos) > 0
             try:
-                invernaderos = cargar_configuracion(filepath)
-                flash(' Configuración cargada exitosamente.')
+                with metricas.medir('carga'):
+                    nuevos = cargar_configuracion(filepath)
+                    if fusionar:
+                        nuevos, cambios = fusionar_configuracion(invernaderos, nuevos)
+                metricas.incrementar('cargas')
+                if instantanea:
+                    instantanea.guardar(nuevos)
+                if fusionar:
+                    descartadas = {CacheSimulaciones.clave(inv, plan) for inv, plan in cambios['descartados']}
+                    reemplazar_configuracion(nuevos, descartadas)
+                    metricas.incrementar('fusiones')
+                    flash(f" Configuración fusionada: {len(cambios['invernaderos_agregados'])} invernaderos nuevos, "
+                          f"{len(cambios['invernaderos_modificados'])} modificados, "
+                          f"{len(cambios['planes_agregados'])} planes nuevos y "
+                          f"{len(cambios['planes_modificados'])} modificados.")
+                else:
+                    reemplazar_configuracion(nuevos)
+                    flash(' Configuración cargada exitosamente.')
             except Exception as e:
                 flash(f' Error: {str(e)}')
             return redirect(url_for('index'))
@@ -46,83 +214,142 @@ def upload_file():
     return render_template('upload.html')
 
 def cargar_configuracion(filepath):
-    tree = ET.parse(filepath)
-    root = tree.getroot()
+    # Lectura en streaming: cada elemento procesado se libera del árbol
     lista_invernaderos = ListaEnlazada()
-
-    # Drones globales
     drones_globales = {}
-    for dron_elem in root.find('listaDrones'):
-        dron_id = int(dron_elem.get('id'))
-        nombre = dron_elem.get('nombre')
-        drones_globales[dron_id] = Dron(dron_id, nombre)
-
-    # Invernaderos
-    for inv_elem in root.find('listaInvernaderos'):
-        nombre = inv_elem.get('nombre')
-        if not nombre:
-            raise ValueError("Invernadero sin atributo 'nombre'")
-        num_hileras = int(inv_elem.find('numeroHileras').text)
-        plantas_x = int(inv_elem.find('plantasXhilera').text)
-        invernadero = Invernadero(nombre, num_hileras, plantas_x)
-
-        # Plantas
-        for p in inv_elem.find('listaPlantas'):
-            hilera = int(p.get('hilera'))
-            posicion = int(p.get('posicion'))
-            agua = float(p.get('litrosAgua'))
-            fert = float(p.get('gramosFertilizante'))
-            nombre_planta = p.text.strip() if p.text else f"Planta H{hilera}P{posicion}"
-            invernadero.plantas.agregar(Planta(hilera, posicion, agua, fert, nombre_planta))
-
-        # Asignación drones
-        for asig in inv_elem.find('asignacionDrones'):
-            dron_id = int(asig.get('id'))
-            hilera = int(asig.get('hilera'))
-            invernadero.asignar_dron_a_hilera(dron_id, hilera)
-            if dron_id in drones_globales:
-                invernadero.drones.agregar(drones_globales[dron_id])
-            else:
-                raise ValueError(f"Dron ID {dron_id} no definido")
-
-        # Planes - CORRECCIÓN IMPORTANTE
-        for plan_elem in inv_elem.find('planesRiego'):
-            nombre_plan = plan_elem.get('nombre')
-            plan_text = plan_elem.text.strip() if plan_elem.text else ""
-            secuencia = ListaEnlazada()
-            
-            # Parsear correctamente las referencias
-            for ref in plan_text.split(','):
-                ref = ref.strip()
-                if not ref:
-                    continue
-                try:
-                    # Manejar formato "H1-P2"
-                    h_part, p_part = ref.split('-')
-                    hilera = int(h_part[1:])  # Remover 'H'
-                    posicion = int(p_part[1:])  # Remover 'P'
-                    
-                    # Buscar la planta correspondiente
-                    planta_encontrada = None
-                    for planta in invernadero.plantas:
-                        if planta.hilera == hilera and planta.posicion == posicion:
-                            planta_encontrada = planta
-                            break
-                    
-                    if planta_encontrada:
-                        secuencia.agregar(planta_encontrada)
-                    else:
-                        print(f"Advertencia: Planta {ref} no encontrada en invernadero {nombre}")
-                        
-                except (ValueError, IndexError) as e:
-                    print(f"Error parseando referencia '{ref}': {e}")
-                    continue
-                    
-            invernadero.planes.agregar(PlanRiego(nombre_plan, secuencia))
-
-        lista_invernaderos.agregar(invernadero)
+    asignaciones = []  # (invernadero, dron_id), se resuelven al final
+    pila = []
+    invernadero = None
+    planes_pendientes = []
+
+    for evento, elem in ET.iterparse(filepath, events=('start', 'end')):
+        if evento == 'start':
+            if elem.tag == 'invernadero' and pila and pila[-1].tag == 'listaInvernaderos':
+                nombre = elem.get('nombre')
+                if not nombre:
+                    raise ValueError("Invernadero sin atributo 'nombre'")
+                invernadero = Invernadero(nombre, 0, 0)
+                planes_pendientes = []
+            pila.append(elem)
+            continue
+
+        pila.pop()
+        padre = pila[-1].tag if pila else None
+
+        if elem.tag == 'dron' and padre == 'listaDrones':
+            # Drones globales
+            dron_id = int(elem.get('id'))
+            drones_globales[dron_id] = Dron(dron_id, elem.get('nombre'))
+        elif elem.tag == 'numeroHileras' and invernadero:
+            invernadero.numero_hileras = int(elem.text)
+        elif elem.tag == 'plantasXhilera' and invernadero:
+            invernadero.plantas_x_hilera = int(elem.text)
+        elif elem.tag == 'planta' and padre == 'listaPlantas':
+            hilera = int(elem.get('hilera'))
+            posicion = int(elem.get('posicion'))
+            agua = float(elem.get('litrosAgua'))
+            fert = float(elem.get('gramosFertilizante'))
+            nombre_planta = elem.text.strip() if elem.text else f"Planta H{hilera}P{posicion}"
+            invernadero.crear_planta(hilera, posicion, agua, fert, nombre_planta)
+        elif elem.tag == 'dron' and padre == 'asignacionDrones':
+            # Asignación drones
+            dron_id = int(elem.get('id'))
+            invernadero.asignar_dron_a_hilera(dron_id, int(elem.get('hilera')))
+            asignaciones.append((invernadero, dron_id))
+        elif elem.tag == 'plan' and padre == 'planesRiego':
+            planes_pendientes.append((elem.get('nombre'), elem.text.strip() if elem.text else ""))
+        elif elem.tag == 'invernadero' and padre == 'listaInvernaderos':
+            # Planes: se resuelven al cerrar el invernadero, con todas sus plantas cargadas
+            for nombre_plan, plan_text in planes_pendientes:
+                invernadero.agregar_plan(PlanRiego(nombre_plan, parsear_secuencia(invernadero, plan_text)))
+            lista_invernaderos.agregar(invernadero)
+            invernadero = None
+
+        # Liberar el elemento ya procesado para mantener la memoria acotada
+        elem.clear()
+        if pila:
+            pila[-1].remove(elem)
+
+    for invernadero, dron_id in asignaciones:
+        if dron_id in drones_globales:
+            invernadero.agregar_dron(drones_globales[dron_id])
+        else:
+            raise ValueError(f"Dron ID {dron_id} no definido")
+    # Los Dron son inmutables, así que compartirlos entre invernaderos es seguro
+    for invernadero in lista_invernaderos:
+        invernadero.congelar()
     return lista_invernaderos
 
+def parsear_secuencia(invernadero, plan_text):
+    secuencia = ListaEnlazada()
+    # Parsear correctamente las referencias
+    for ref in plan_text.split(','):
+        ref = ref.strip()
+        if not ref:
+            continue
+        try:
+            # Manejar formato "H1-P2"
+            h_part, p_part = ref.split('-')
+            hilera = int(h_part[1:])  # Remover 'H'
+            posicion = int(p_part[1:])  # Remover 'P'
+
+            # Buscar la planta correspondiente en el índice del invernadero
+            planta_encontrada = invernadero.buscar_planta(hilera, posicion)
+            if planta_encontrada:
+                secuencia.agregar(planta_encontrada)
+            else:
+                logger.warning("Planta %s no encontrada en invernadero %s", ref, invernadero.nombre)
+
+        except (ValueError, IndexError) as e:
+            logger.warning("Error parseando referencia '%s': %s", ref, e)
+            continue
+    return secuencia
+
+def obtener_simulacion(invernadero, plan, clave=None):
+    """Devuelve (simulador, None) si el mismo contenido ya se simuló; si no,
+    (None, trabajo) con la simulación encolada en segundo plano."""
+    if clave is None:
+        clave = CacheSimulaciones.clave(invernadero, plan)
+    resultado = cache_simulaciones.obtener(clave)
+    if resultado is not None:
+        return Simulador.desde_resultado(invernadero, plan, resultado), None
+    return None, cola_trabajos.enviar(invernadero, plan)
+
+def pagina_progreso(invernadero, plan, trabajo):
+    # La página consulta el trabajo y se recarga al terminar
+    return render_template('progreso.html',
+                           invernadero=invernadero,
+                           plan=plan,
+                           trabajo=trabajo,
+                           progreso_url=url_for('estado_trabajo', trabajo_id=trabajo.id)), 202
+
+def simular_todos():
+    # Las simulaciones que no están en cache se reparten en un pool de procesos;
+    # el resultado conserva el orden invernadero -> plan de la configuración
+    pares = []
+    resultados = {}  # clave -> resultado
+    pendientes = {}  # clave -> (inv_idx, plan_idx)
+    for inv_idx, inv in enumerate(invernaderos):
+        for plan_idx, plan in enumerate(inv.planes):
+            clave = CacheSimulaciones.clave(inv, plan)
+            pares.append((inv, plan, clave))
+            if clave in resultados or clave in pendientes:
+                continue
+            resultado = cache_simulaciones.obtener(clave)
+            if resultado is None:
+                pendientes[clave] = (inv_idx, plan_idx)
+            else:
+                resultados[clave] = resultado
+
+    if pendientes:
+        nuevos = simular_en_paralelo(invernaderos, list(pendientes.values()),
+                                     app.config['TRABAJADORES_SALIDA'])
+        for clave, resultado in zip(pendientes, nuevos):
+            cache_simulaciones.guardar(clave, resultado)
+            resultados[clave] = resultado
+
+    return [Simulador.desde_resultado(inv, plan, resultados[clave]) for inv, plan, clave in pares]
+
 @app.route('/simulate/<int:inv_idx>/<int:plan_idx>')
 def simulate(inv_idx, plan_idx):
     invernadero = invernaderos.obtener(inv_idx)
@@ -135,43 +362,111 @@ def simulate(inv_idx, plan_idx):
         flash("Plan no encontrado")
         return redirect(url_for('index'))
 
-    simulador = Simulador(invernadero, plan)
-    simulador.simular()
+    clave = CacheSimulaciones.clave(invernadero, plan)
+    simulador, trabajo = obtener_simulacion(invernadero, plan, clave)
+    if simulador is None:
+        return pagina_progreso(invernadero, plan, trabajo)
 
-    report_html = simulador.generar_reporte_html()
     report_name = f"report_{invernadero.nombre}_{plan.nombre}.html".replace(" ", "_").replace("/", "_")
-    with open(os.path.join(REPORTS_FOLDER, report_name), 'w', encoding='utf-8') as f:
-        f.write(report_html)
+    escribir_reporte(simulador, report_name, clave)
 
+    filas = app.config['REPORTE_FILAS']
+    paginas = simulador.paginas_reporte(filas)
+    pagina = min(max(request.args.get('pagina', 1, type=int), 1), paginas)
+    desde = (pagina - 1) * filas + 1
     return render_template('simulate.html',
                            inv_idx=inv_idx,
                            plan_idx=plan_idx,
                            invernadero=invernadero,
                            plan=plan,
                            simulador=simulador,
+                           instrucciones=simulador.historial.rango(desde, desde + filas - 1),
+                           pagina=pagina,
+                           paginas=paginas,
                            report_url=url_for('serve_report', filename=report_name))
 
+def escribir_reporte(simulador, nombre, clave):
+    """Escribe el reporte paginado en REPORTS_FOLDER solo si cambió su
+    contenido (simulación, filas por página o plantilla). Cada página
+    lleva la huella en su primera línea (sirve de ETag); la primera se
+    escribe al final, así que si coincide las demás ya están completas."""
+    filas = app.config['REPORTE_FILAS']
+    fuente = app.jinja_env.loader.get_source(app.jinja_env, 'reporte.html')[0]
+    huella = hashlib.sha256(f"{clave}|{filas}|{fuente}".encode('utf-8')).hexdigest()
+    marca = MARCA_REPORTE.format(huella)
+    ruta = os.path.join(REPORTS_FOLDER, nombre)
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            if f.readline() == marca:
+                metricas.incrementar('reportes_sin_cambios')
+                return False
+    except FileNotFoundError:
+        pass
+
+    base, extension = os.path.splitext(nombre)
+    def enlace(pagina):
+        return nombre if pagina == 1 else f"{base}_p{pagina}{extension}"
+
+    plantilla = app.jinja_env.get_template('reporte.html')
+    paginas = simulador.paginas_reporte(filas)
+    # Páginas sobrantes de una versión anterior más larga
+    sobrante = paginas + 1
+    while os.path.exists(os.path.join(REPORTS_FOLDER, enlace(sobrante))):
+        os.remove(os.path.join(REPORTS_FOLDER, enlace(sobrante)))
+        if os.path.exists(os.path.join(REPORTS_FOLDER, enlace(sobrante) + '.gz')):
+            os.remove(os.path.join(REPORTS_FOLDER, enlace(sobrante) + '.gz'))
+        sobrante += 1
+    with metricas.medir('reporte'):
+        for pagina in range(paginas, 0, -1):
+            descriptor, temporal = tempfile.mkstemp(dir=REPORTS_FOLDER, suffix='.tmp')
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                f.write(marca)
+                for fragmento in simulador.iter_reporte_html(pagina, filas, enlace, plantilla):
+                    f.write(fragmento)
+            os.replace(temporal, os.path.join(REPORTS_FOLDER, enlace(pagina)))
+    return True
+
 @app.route('/graph/<int:inv_idx>/<int:plan_idx>', methods=['GET', 'POST'])
 def graph(inv_idx, plan_idx):
     invernadero = invernaderos.obtener(inv_idx)
     plan = invernadero.planes.obtener(plan_idx)
-    simulador = Simulador(invernadero, plan)
-    simulador.simular()
+    clave = CacheSimulaciones.clave(invernadero, plan)
+    t = request.values.get('t', 1, type=int)
 
-    t = request.form.get('t', 1, type=int)
-    svg_grafico = simulador.generar_grafico_tda(t)
+    # Misma configuración, plan y tiempo: el cliente ya tiene la página
+    etag = hashlib.sha256(f"{invernadero.nombre}|{plan.nombre}|{clave}|{t}|{app.config['GRAFICOS_MOTOR']}"
+                          .encode('utf-8')).hexdigest()
+    # Se responde con la variante que coincidió (la comprimida lleva -gzip)
+    for variante in (etag, f"{etag}-gzip"):
+        if request.if_none_match.contains(variante):
+            respuesta = Response(status=304)
+            respuesta.set_etag(variante)
+            respuesta.vary.add('Accept-Encoding')
+            return respuesta
 
-    return render_template('graph.html',
-                           inv_idx=inv_idx,
-                           plan_idx=plan_idx,
-                           invernadero=invernadero,
-                           plan=plan,
-                           t=t,
-                           svg_grafico=svg_grafico)
+    simulador, trabajo = obtener_simulacion(invernadero, plan, clave)
+    if simulador is None:
+        return pagina_progreso(invernadero, plan, trabajo)
+    # Los tiempos siguientes se renderizan en el mismo lote para recorrerlos sin esperar
+    hasta = min(t + app.config['GRAFICOS_LOTE'], simulador.tiempo_total + 1)
+    renderizador.prerenderizar(simulador, clave, [t] + list(range(t + 1, hasta)))
+    svg_grafico = renderizador.obtener(simulador, clave, t)
+
+    respuesta = make_response(render_template('graph.html',
+                                              inv_idx=inv_idx,
+                                              plan_idx=plan_idx,
+                                              invernadero=invernadero,
+                                              plan=plan,
+                                              t=t,
+                                              svg_grafico=svg_grafico))
+    respuesta.set_etag(etag)
+    respuesta.last_modified = cargada_en
+    return respuesta
 
 @app.route('/reports/<filename>')
 def serve_report(filename):
-    return send_from_directory(REPORTS_FOLDER, filename)
+    ruta = safe_join(os.path.abspath(REPORTS_FOLDER), filename)
+    return enviar_archivo(REPORTS_FOLDER, filename, leer_huella(ruta) if ruta else None)
 
 @app.route('/generar_salida')
 def generar_salida():
@@ -179,25 +474,141 @@ def generar_salida():
         flash("No hay configuración cargada")
         return redirect(url_for('index'))
 
-    root = ET.Element("datosSalida")
-    lista_inv = ET.SubElement(root, "listaInvernaderos")
+    solo_estadisticas = request.args.get('solo_estadisticas', '').lower() in ('1', 'true', 'si')
+    nombre_salida = "salida_estadisticas.xml" if solo_estadisticas else "salida.xml"
+    salida_path = os.path.join(OUTPUT_FOLDER, nombre_salida)
+    huella = hashlib.sha256(f"{nombre_salida}|{huella_configuracion()}".encode('utf-8')).hexdigest()
+    if os.path.exists(salida_path) and leer_huella(salida_path) == huella:
+        metricas.incrementar('salidas_sin_cambios')
+        flash(f" Archivo {nombre_salida} sin cambios")
+        return redirect(url_for('index'))
 
-    for inv in invernaderos:
-        for plan in inv.planes:
-            simulador = Simulador(inv, plan)
-            simulador.simular()
-            simulador.generar_xml_salida(lista_inv)
-
-    tree = ET.ElementTree(root)
-    ET.indent(tree, space="  ", level=0)
-    salida_path = os.path.join(OUTPUT_FOLDER, "salida.xml")
-    tree.write(salida_path, encoding='utf-8', xml_declaration=True)
-    flash(" Archivo salida.xml generado")
+    if solo_estadisticas:
+        # Sin instrucciones por tiempo: solo tiempo óptimo y consumos
+        simuladores = [obtener_estadisticas(inv, plan) for inv in invernaderos for plan in inv.planes]
+    else:
+        simuladores = simular_todos()
+    if os.path.exists(salida_path + '.huella'):
+        os.remove(salida_path + '.huella')
+    with metricas.medir('salida'):
+        escribir_salida_xml(salida_path, simuladores)
+    with open(salida_path + '.huella', 'w', encoding='utf-8') as f:
+        f.write(huella)
+    flash(f" Archivo {nombre_salida} generado")
     return redirect(url_for('index'))
 
 @app.route('/outputs/<path:filename>')
 def download_output(filename):
-    return send_from_directory(OUTPUT_FOLDER, filename)
+    ruta = safe_join(os.path.abspath(OUTPUT_FOLDER), filename)
+    return enviar_archivo(OUTPUT_FOLDER, filename, leer_huella(ruta) if ruta else None)
+
+@app.route('/instrucciones/<int:inv_idx>/<int:plan_idx>.<formato>')
+def exportar_instrucciones(inv_idx, plan_idx, formato):
+    # Se envía cada segundo apenas se genera; si la simulación no está en
+    # cache las instrucciones salen directo del motor sin guardarse
+    invernadero = invernaderos.obtener(inv_idx)
+    plan = invernadero.planes.obtener(plan_idx) if invernadero else None
+    if not plan:
+        return jsonify({'error': 'Invernadero o plan no encontrado'}), 404
+    if formato not in ('ndjson', 'csv'):
+        return jsonify({'error': f"Formato '{formato}' no soportado, use ndjson o csv"}), 404
+
+    resultado = cache_simulaciones.obtener(CacheSimulaciones.clave(invernadero, plan))
+    if resultado is not None:
+        simulador = Simulador.desde_resultado(invernadero, plan, resultado)
+    else:
+        simulador = Simulador(invernadero, plan)
+    nombres, instrucciones = simulador.flujo_instrucciones()
+    metricas.incrementar('exportaciones')
+
+    if formato == 'csv':
+        cuerpo, tipo = iter_instrucciones_csv(nombres, instrucciones), 'text/csv'
+    else:
+        cuerpo, tipo = iter_instrucciones_ndjson(instrucciones), 'application/x-ndjson'
+    nombre_archivo = f"instrucciones_{invernadero.nombre}_{plan.nombre}.{formato}".replace(" ", "_").replace("/", "_")
+    return Response(stream_with_context(cuerpo), mimetype=tipo,
+                    headers={'Content-Disposition': f'inline; filename="{nombre_archivo}"'})
+
+@app.route('/trabajos/<int:inv_idx>/<int:plan_idx>', methods=['POST'])
+def crear_trabajo(inv_idx, plan_idx):
+    invernadero = invernaderos.obtener(inv_idx)
+    plan = invernadero.planes.obtener(plan_idx) if invernadero else None
+    if not plan:
+        return jsonify({'error': 'Invernadero o plan no encontrado'}), 404
+    trabajo = cola_trabajos.enviar(invernadero, plan)
+    respuesta = trabajo.como_dict()
+    respuesta['progreso_url'] = url_for('estado_trabajo', trabajo_id=trabajo.id)
+    respuesta['resultado_url'] = url_for('resultado_trabajo', trabajo_id=trabajo.id)
+    return jsonify(respuesta), 202
+
+@app.route('/trabajos/<trabajo_id>')
+def estado_trabajo(trabajo_id):
+    trabajo = cola_trabajos.obtener(trabajo_id)
+    if not trabajo:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    return jsonify(trabajo.como_dict())
+
+@app.route('/trabajos/<trabajo_id>/resultado')
+def resultado_trabajo(trabajo_id):
+    trabajo = cola_trabajos.obtener(trabajo_id)
+    if not trabajo:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    if trabajo.estado != "terminado":
+        return jsonify(trabajo.como_dict()), 409
+    respuesta = resumen_estadisticas(trabajo.nombre_invernadero, trabajo.nombre_plan,
+                                     trabajo.resultado['tiempo_total'], trabajo.resultado['estadisticas'])
+    respuesta['id'] = trabajo.id
+    return jsonify(respuesta)
+
+def resumen_estadisticas(nombre_invernadero, nombre_plan, tiempo_total, estadisticas):
+    return {
+        'invernadero': nombre_invernadero,
+        'plan': nombre_plan,
+        'tiempoOptimoSegundos': tiempo_total,
+        'aguaRequeridaLitros': estadisticas['agua_total'],
+        'fertilizanteRequeridoGramos': estadisticas['fertilizante_total'],
+        'drones': [{'nombre': nombre, 'litrosAgua': agua, 'gramosFertilizante': fert}
+                   for nombre, agua, fert in estadisticas['drones']],
+    }
+
+def obtener_estadisticas(invernadero, plan):
+    # Si la simulación completa ya está en cache se usa; si no, el cálculo
+    # rápido (sin instrucciones) es tan barato que no se guarda
+    resultado = cache_simulaciones.obtener(CacheSimulaciones.clave(invernadero, plan))
+    if resultado is not None:
+        return Simulador.desde_resultado(invernadero, plan, resultado)
+    simulador = Simulador(invernadero, plan)
+    simulador.calcular_estadisticas()
+    return simulador
+
+@app.route('/estadisticas')
+def estadisticas_todas():
+    resumenes = []
+    for inv in invernaderos:
+        for plan in inv.planes:
+            simulador = obtener_estadisticas(inv, plan)
+            resumenes.append(resumen_estadisticas(inv.nombre, plan.nombre, simulador.tiempo_total, simulador.estadisticas))
+    return jsonify(resumenes)
+
+@app.route('/estadisticas/<int:inv_idx>/<int:plan_idx>')
+def estadisticas_plan(inv_idx, plan_idx):
+    invernadero = invernaderos.obtener(inv_idx)
+    plan = invernadero.planes.obtener(plan_idx) if invernadero else None
+    if not plan:
+        return jsonify({'error': 'Invernadero o plan no encontrado'}), 404
+    simulador = obtener_estadisticas(invernadero, plan)
+    return jsonify(resumen_estadisticas(invernadero.nombre, plan.nombre, simulador.tiempo_total, simulador.estadisticas))
+
+@app.route('/cache')
+def estado_cache():
+    return jsonify(cache_simulaciones.estadisticas())
+
+@app.route('/metrics')
+def metrics():
+    datos = metricas.instantanea()
+    datos['cache'] = cache_simulaciones.estadisticas()
+    datos['cache_graficos'] = renderizador.cache.estadisticas()
+    return jsonify(datos)
 
 @app.route('/help')
 def help_page():
@@ -0,0 +1,171 @@
+"""Benchmark por etapas sobre configuraciones sintéticas de varios tamaños.
+
+Mide carga (cargar_configuracion), simulación (Simulador.simular),
+estadísticas rápidas (verificadas contra la simulación completa),
+salida.xml, reporte HTML y gráfico de TDAs: tiempo y pico de memoria.
+
+Uso: python -m benchmarks.bench_etapas [--tamanos pequeno,mediano]
+         [--guardar base.json] [--comparar base.json] [--tolerancia 0.25]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.generador import generar_xml
+
+# (invernaderos, hileras, plantas_x_hilera, drones, largo_plan, planes)
+TAMANOS = {
+    'pequeno': (1, 4, 25, 4, 100, 2),
+    'mediano': (2, 10, 100, 10, 2000, 2),
+    'grande': (2, 16, 400, 16, 10000, 2),
+}
+ETAPAS = ('carga', 'simulacion', 'estadisticas', 'salida_xml', 'reporte_html', 'grafico')
+TIEMPOS_GRAFICO = 10
+
+
+def _etapas(ruta_xml, directorio):
+    """Genera (etapa, funcion) en orden; cada etapa usa lo que dejó la anterior."""
+    import app
+    from models.graficos import RenderizadorGraficos
+    from models.salida import escribir_salida_xml
+    from models.simulador import Simulador
+
+    estado = {}
+
+    def carga():
+        estado['invernaderos'] = app.cargar_configuracion(ruta_xml)
+
+    def simulacion():
+        estado['simuladores'] = []
+        for inv in estado['invernaderos']:
+            for plan in inv.planes:
+                simulador = Simulador(inv, plan)
+                simulador.simular()
+                estado['simuladores'].append(simulador)
+
+    def estadisticas():
+        # El cálculo rápido debe coincidir con la simulación completa
+        for completo in estado['simuladores']:
+            rapido = Simulador(completo.invernadero, completo.plan)
+            rapido.calcular_estadisticas()
+            if (rapido.tiempo_total, rapido.estadisticas) != (completo.tiempo_total, completo.estadisticas):
+                raise AssertionError(f"calcular_estadisticas difiere de simular() en {completo.plan.nombre}")
+
+    def salida_xml():
+        escribir_salida_xml(os.path.join(directorio, 'salida.xml'), estado['simuladores'])
+
+    def reporte_html():
+        with open(os.devnull, 'w', encoding='utf-8') as f:
+            for simulador in estado['simuladores']:
+                for fragmento in simulador.iter_reporte_html():
+                    f.write(fragmento)
+
+    def grafico():
+        # Mismo camino que /graph: un lote por simulación con el motor disponible
+        simulador = estado['simuladores'][0]
+        paso = max(1, simulador.tiempo_total // TIEMPOS_GRAFICO)
+        RenderizadorGraficos().prerenderizar(simulador, 'bench', range(1, simulador.tiempo_total + 1, paso))
+
+    return [('carga', carga), ('simulacion', simulacion), ('estadisticas', estadisticas), ('salida_xml', salida_xml),
+            ('reporte_html', reporte_html), ('grafico', grafico)]
+
+
+def medir(ruta_xml, directorio, con_memoria):
+    resultados = {}
+    if con_memoria:
+        tracemalloc.start()
+    try:
+        for etapa, funcion in _etapas(ruta_xml, directorio):
+            if con_memoria:
+                tracemalloc.reset_peak()
+            inicio = time.perf_counter()
+            try:
+                funcion()
+            except Exception as e:  # p. ej. Graphviz sin el ejecutable dot
+                resultados[etapa] = {'error': f"{type(e).__name__}: {e}"}
+                continue
+            duracion = time.perf_counter() - inicio
+            resultados[etapa] = {'pico_mb': tracemalloc.get_traced_memory()[1] / 2**20} if con_memoria \
+                else {'segundos': duracion}
+    finally:
+        if con_memoria:
+            tracemalloc.stop()
+    return resultados
+
+
+def correr(tamanos, con_memoria=True):
+    salida = {'python': platform.python_version(), 'maquina': platform.machine(), 'tamanos': {}}
+    with tempfile.TemporaryDirectory() as directorio:
+        for nombre in tamanos:
+            parametros = TAMANOS[nombre]
+            ruta = os.path.join(directorio, f'{nombre}.xml')
+            generar_xml(ruta, *parametros)
+            etapas = medir(ruta, directorio, con_memoria=False)
+            if con_memoria:
+                for etapa, datos in medir(ruta, directorio, con_memoria=True).items():
+                    etapas.setdefault(etapa, {}).update(datos)
+            salida['tamanos'][nombre] = {'parametros': parametros, 'etapas': etapas}
+    return salida
+
+
+def imprimir(salida, base=None, tolerancia=0.25):
+    regresiones = []
+    print(f"{'tamaño':<10} {'etapa':<14} {'segundos':>10} {'pico MB':>9}  comparación")
+    for nombre, datos in salida['tamanos'].items():
+        for etapa in ETAPAS:
+            medicion = datos['etapas'].get(etapa, {})
+            if 'error' in medicion:
+                print(f"{nombre:<10} {etapa:<14} {'-':>10} {'-':>9}  omitida ({medicion['error']})")
+                continue
+            segundos = medicion.get('segundos')
+            pico = medicion.get('pico_mb')
+            nota = ""
+            anterior = (base or {}).get('tamanos', {}).get(nombre, {}).get('etapas', {}).get(etapa, {})
+            for clave, actual in (('segundos', segundos), ('pico_mb', pico)):
+                previo = anterior.get(clave)
+                if previo and actual is not None:
+                    razon = actual / previo
+                    nota += f" {clave} x{razon:.2f}"
+                    if razon > 1 + tolerancia:
+                        regresiones.append((nombre, etapa, clave, razon))
+                        nota += " REGRESIÓN"
+            texto_pico = f"{pico:>9.1f}" if pico is not None else f"{'-':>9}"
+            print(f"{nombre:<10} {etapa:<14} {segundos:>10.4f} {texto_pico} {nota}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark por etapas")
+    parser.add_argument('--tamanos', default='pequeno,mediano',
+                        help=f"separados por coma, de: {', '.join(TAMANOS)}")
+    parser.add_argument('--guardar', help="guardar los resultados como línea base (JSON)")
+    parser.add_argument('--comparar', help="línea base JSON contra la cual comparar")
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="aumento relativo permitido antes de marcar regresión")
+    parser.add_argument('--sin-memoria', action='store_true', help="omitir la pasada con tracemalloc")
+    args = parser.parse_args()
+
+    logging.getLogger('guateriegos').setLevel(logging.WARNING)
+    salida = correr(args.tamanos.split(','), con_memoria=not args.sin_memoria)
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)
+    regresiones = imprimir(salida, base, args.tolerancia)
+
+    if args.guardar:
+        with open(args.guardar, 'w', encoding='utf-8') as f:
+            json.dump(salida, f, indent=2)
+        print(f"Línea base guardada en {args.guardar}")
+    if regresiones:
+        raise SystemExit(f"{len(regresiones)} regresión(es) sobre la tolerancia de {args.tolerancia:.0%}")
+
+
+if __name__ == '__main__':
+    main()
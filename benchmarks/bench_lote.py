@@ -0,0 +1,58 @@
+"""Benchmark de EvaluadorPlanes: miles de planes candidatos sobre un invernadero.
+
+Compara contra Simulador.calcular_estadisticas plan por plan y verifica
+que los resultados coincidan.
+
+Uso: python -m benchmarks.bench_lote [planes] [largo]
+"""
+import logging
+import random
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_salida import construir
+from models.lote import EvaluadorPlanes
+from models.plan import PlanRiego
+from models.simulador import Simulador
+from models.tda import ListaEnlazada
+
+
+def main():
+    num_planes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    largo = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    logging.getLogger('guateriegos').setLevel(logging.WARNING)
+
+    invernadero = construir(num_invernaderos=1, planes=0).obtener(0)
+    aleatorio = random.Random(3)
+    planes = [np.array([(aleatorio.randint(1, invernadero.numero_hileras),
+                         aleatorio.randint(1, invernadero.plantas_x_hilera)) for _ in range(largo)])
+              for _ in range(num_planes)]
+
+    inicio = time.perf_counter()
+    evaluador = EvaluadorPlanes(invernadero)
+    lote = evaluador.evaluar(planes)
+    t_lote = time.perf_counter() - inicio
+
+    muestra = planes[:min(200, num_planes)]
+    inicio = time.perf_counter()
+    for b, arreglo in enumerate(muestra):
+        secuencia = ListaEnlazada()
+        for h, p in arreglo:
+            secuencia.agregar(invernadero.buscar_planta(int(h), int(p)))
+        simulador = Simulador(invernadero, PlanRiego(f"Plan {b}", secuencia))
+        simulador.calcular_estadisticas()
+        assert simulador.tiempo_total == lote['tiempo_total'][b]
+        assert simulador.estadisticas['agua_total'] == lote['agua_total'][b]
+        assert simulador.estadisticas['fertilizante_total'] == lote['fertilizante_total'][b]
+    t_uno = (time.perf_counter() - inicio) / len(muestra)
+
+    print(f"lote NumPy:   {num_planes} planes de {largo} en {t_lote:.3f} s "
+          f"({num_planes / t_lote:,.0f} planes/s)")
+    print(f"uno por uno:  {1 / t_uno:,.0f} planes/s (calcular_estadisticas, muestra de {len(muestra)})")
+    print(f"resultados idénticos en la muestra; aceleración x{t_uno * num_planes / t_lote:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark de Simulador.resimular: ediciones al final de un plan largo.
+
+Cada edición (agregar, reordenar, truncar y reemplazar la cola del plan)
+se resimula desde la simulación anterior y se compara con una simulación
+completa: tiempo, estadísticas, plantas por dron e historial.estado(t)
+de cada segundo. La comparación se repite con varios intervalos de
+puntos de control; el tiempo se mide con el intervalo por defecto.
+
+Uso: python -m benchmarks.bench_resimulacion [largo] [cola]
+"""
+import logging
+import random
+import sys
+import time
+
+from benchmarks.bench_salida import construir
+from models.motor import MotorRiego
+from models.plan import PlanRiego
+from models.simulador import Simulador
+from models.tda import ListaEnlazada
+
+
+def plan_con(nombre, plantas):
+    secuencia = ListaEnlazada()
+    for planta in plantas:
+        secuencia.agregar(planta)
+    return PlanRiego(nombre, secuencia)
+
+
+def ediciones(plantas, todas, cola, aleatorio):
+    # Cada edición cambia solo las últimas `cola` plantas del plan
+    corte = len(plantas) - cola
+    reordenada = plantas[corte:]
+    aleatorio.shuffle(reordenada)
+    return [
+        ('agregar', plantas + [aleatorio.choice(todas) for _ in range(cola)]),
+        ('reordenar', plantas[:corte] + reordenada),
+        ('truncar', plantas[:corte]),
+        ('reemplazar', plantas[:corte] + [aleatorio.choice(todas) for _ in range(cola)]),
+    ]
+
+
+def resumen(simulador):
+    historial = simulador.historial
+    return (simulador.tiempo_total, simulador.estadisticas,
+            [e.plantas_regadas for e in simulador.estados_drones],
+            [historial.estado(t) for t in range(1, len(historial) + 1)])
+
+
+def comparar(invernadero, plantas, todas, cola, intervalo, aleatorio):
+    MotorRiego.INTERVALO_CONTROL = intervalo
+    base = Simulador(invernadero, plan_con("Base", plantas))
+    base.simular()
+    for nombre, nuevas in ediciones(plantas, todas, cola, aleatorio):
+        plan = plan_con(nombre, nuevas)
+        completo = Simulador(invernadero, plan)
+        completo.simular()
+        assert resumen(base.resimular(plan)) == resumen(completo), \
+            f"resimular difiere en '{nombre}' con intervalo {intervalo}"
+
+
+def main():
+    largo = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    cola = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    logging.getLogger('guateriegos').setLevel(logging.WARNING)
+
+    invernadero = construir(num_invernaderos=1, planes=0).obtener(0)
+    todas = list(invernadero.plantas)
+    aleatorio = random.Random(11)
+    intervalo_defecto = MotorRiego.INTERVALO_CONTROL
+
+    # Plan corto con intervalos pequeños: los puntos de control caen cerca del cambio
+    corto = [aleatorio.choice(todas) for _ in range(300)]
+    for intervalo in (1, 2, 4, intervalo_defecto):
+        comparar(invernadero, corto, todas, min(cola, 20), intervalo, aleatorio)
+    MotorRiego.INTERVALO_CONTROL = intervalo_defecto
+
+    plantas = [aleatorio.choice(todas) for _ in range(largo)]
+    comparar(invernadero, plantas, todas, cola, intervalo_defecto, aleatorio)
+    base = Simulador(invernadero, plan_con("Base", plantas))
+    base.simular()
+    print(f"plan de {largo} plantas, edición de las últimas {cola}")
+    for nombre, nuevas in ediciones(plantas, todas, cola, aleatorio):
+        plan = plan_con(nombre, nuevas)
+        inicio = time.perf_counter()
+        Simulador(invernadero, plan).simular()
+        t_completo = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        base.resimular(plan)
+        t_resimular = time.perf_counter() - inicio
+        print(f"{nombre:<11} completo {t_completo:.3f} s  resimular {t_resimular:.3f} s  "
+              f"x{t_completo / t_resimular:.1f}")
+    print("resultados idénticos (intervalos 1, 2, 4 y "
+          f"{intervalo_defecto}; agregar, reordenar, truncar y reemplazar)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Micro-benchmark de ListaEnlazada: agregar y obtener deben ser O(1).
+
+Uso: python -m benchmarks.bench_tda
+"""
+import time
+
+from models.tda import ListaEnlazada
+
+TAMANOS = [12500, 25000, 50000, 100000]
+
+
+def medir_agregar(n):
+    lista = ListaEnlazada()
+    inicio = time.perf_counter()
+    for i in range(n):
+        lista.agregar(i)
+    return time.perf_counter() - inicio, lista
+
+
+def medir_obtener(lista):
+    n = len(lista)
+    inicio = time.perf_counter()
+    for i in range(n):
+        lista.obtener(i)
+    return time.perf_counter() - inicio
+
+
+def main():
+    print(f"{'n':>8} {'agregar (s)':>12} {'ns/elem':>9} {'obtener (s)':>12} {'ns/elem':>9}")
+    por_elemento = []
+    for n in TAMANOS:
+        t_agregar, lista = medir_agregar(n)
+        t_obtener = medir_obtener(lista)
+        assert len(lista) == n and lista.obtener(n - 1) == n - 1
+        por_elemento.append(t_agregar / n)
+        print(f"{n:>8} {t_agregar:>12.4f} {t_agregar / n * 1e9:>9.1f} "
+              f"{t_obtener:>12.4f} {t_obtener / n * 1e9:>9.1f}")
+
+    # Con crecimiento lineal el costo por elemento se mantiene estable
+    razon = por_elemento[-1] / por_elemento[0]
+    print(f"Costo por elemento {TAMANOS[-1]} vs {TAMANOS[0]}: x{razon:.2f} (lineal ~ x1)")
+
+
+if __name__ == '__main__':
+    main()
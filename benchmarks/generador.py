@@ -0,0 +1,66 @@
+"""Generador de configuraciones XML sintéticas con el esquema de entrada.
+
+Uso: python -m benchmarks.generador entrada.xml --invernaderos 2 --hileras 10
+         --plantas 100 --drones 10 --largo-plan 2000 [--planes 2] [--semilla 1]
+"""
+import argparse
+import random
+
+
+def generar_xml(ruta, invernaderos=1, hileras=4, plantas_x_hilera=25, drones=4,
+                largo_plan=100, planes=1, semilla=1):
+    """Escribe la configuración en ruta, elemento por elemento.
+
+    Cada invernadero usa sus propios drones, asignados a las primeras
+    min(drones, hileras) hileras; los planes solo referencian plantas de
+    hileras con dron para que todas puedan regarse.
+    """
+    aleatorio = random.Random(semilla)
+    con_dron = min(drones, hileras)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<configuracion>\n  <listaDrones>\n')
+        for k in range(invernaderos):
+            for d in range(1, drones + 1):
+                dron_id = k * drones + d
+                f.write(f'    <dron id="{dron_id}" nombre="DR{dron_id:03d}"/>\n')
+        f.write('  </listaDrones>\n  <listaInvernaderos>\n')
+
+        for k in range(invernaderos):
+            f.write(f'    <invernadero nombre="Invernadero {k + 1}">\n'
+                    f'      <numeroHileras>{hileras}</numeroHileras>\n'
+                    f'      <plantasXhilera>{plantas_x_hilera}</plantasXhilera>\n'
+                    f'      <listaPlantas>\n')
+            for h in range(1, hileras + 1):
+                for p in range(1, plantas_x_hilera + 1):
+                    f.write(f'        <planta hilera="{h}" posicion="{p}" '
+                            f'litrosAgua="{aleatorio.randint(1, 3)}" '
+                            f'gramosFertilizante="{aleatorio.randint(50, 200)}">Planta H{h}P{p}</planta>\n')
+            f.write('      </listaPlantas>\n      <asignacionDrones>\n')
+            for h in range(1, con_dron + 1):
+                f.write(f'        <dron id="{k * drones + h}" hilera="{h}"/>\n')
+            f.write('      </asignacionDrones>\n      <planesRiego>\n')
+            for n in range(1, planes + 1):
+                referencias = (f"H{aleatorio.randint(1, con_dron)}-P{aleatorio.randint(1, plantas_x_hilera)}"
+                               for _ in range(largo_plan))
+                f.write(f'        <plan nombre="Plan {n}">{", ".join(referencias)}</plan>\n')
+            f.write('      </planesRiego>\n    </invernadero>\n')
+        f.write('  </listaInvernaderos>\n</configuracion>\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera una configuración XML sintética")
+    parser.add_argument('ruta')
+    parser.add_argument('--invernaderos', type=int, default=1)
+    parser.add_argument('--hileras', type=int, default=4)
+    parser.add_argument('--plantas', type=int, default=25, help="plantas por hilera")
+    parser.add_argument('--drones', type=int, default=4, help="drones por invernadero")
+    parser.add_argument('--largo-plan', type=int, default=100)
+    parser.add_argument('--planes', type=int, default=1, help="planes por invernadero")
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+    generar_xml(args.ruta, args.invernaderos, args.hileras, args.plantas, args.drones,
+                args.largo_plan, args.planes, args.semilla)
+
+
+if __name__ == '__main__':
+    main()
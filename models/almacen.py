@@ -0,0 +1,73 @@
+from array import array
+
+from .planta import FilaPlantas
+
+class AlmacenPlantas:
+    """Plantas de un invernadero agrupadas en una FilaPlantas por hilera.
+
+    Se recorre, se mide y se indexa como la ListaEnlazada que reemplaza,
+    en el orden de carga. Si dos plantas comparten hilera y posición,
+    buscar devuelve la primera. Mientras una hilera tenga posiciones
+    consecutivas (el caso normal) el índice se calcula sin diccionario.
+    """
+
+    def __init__(self):
+        self.filas = {}  # hilera -> FilaPlantas
+        self._indices = {}  # hilera -> {posicion: indice en la fila}, None si es consecutiva
+        self._orden_hilera = array('q')  # hilera de cada planta en orden de carga
+        self._orden_indice = array('q')  # su índice dentro de la fila
+
+    def crear(self, hilera, posicion, litros_agua, gramos_fertilizante, nombre):
+        fila = self.filas.get(hilera)
+        if fila is None:
+            fila = self.filas[hilera] = FilaPlantas(hilera)
+            self._indices[hilera] = None
+        indices = self._indices[hilera]
+        if indices is None and len(fila) and posicion != fila.posiciones[-1] + 1:
+            indices = self._indices[hilera] = {}
+            for i, p in enumerate(fila.posiciones):
+                indices[p] = i
+        indice = fila.agregar(posicion, litros_agua, gramos_fertilizante, nombre)
+        if indices is not None:
+            indices.setdefault(posicion, indice)
+        self._orden_hilera.append(hilera)
+        self._orden_indice.append(indice)
+
+    def agregar(self, planta):
+        # Se copian los datos; buscar devuelve después la vista guardada
+        self.crear(planta.hilera, planta.posicion, planta.litros_agua,
+                   planta.gramos_fertilizante, planta.nombre)
+
+    def mismo_contenido(self, otro):
+        # Mismas plantas en el mismo orden de carga
+        if (self._orden_hilera != otro._orden_hilera or self._orden_indice != otro._orden_indice
+                or self.filas.keys() != otro.filas.keys()):
+            return False
+        return all(fila.mismo_contenido(otro.filas[hilera]) for hilera, fila in self.filas.items())
+
+    def buscar(self, hilera, posicion):
+        fila = self.filas.get(hilera)
+        if fila is None:
+            return None
+        indices = self._indices[hilera]
+        if indices is None:
+            indice = posicion - fila.posiciones[0]
+            return fila.vista(indice) if 0 <= indice < len(fila) else None
+        indice = indices.get(posicion)
+        return fila.vista(indice) if indice is not None else None
+
+    def obtener(self, i):
+        if i < 0 or i >= len(self._orden_hilera):
+            return None
+        return self.filas[self._orden_hilera[i]].vista(self._orden_indice[i])
+
+    def __iter__(self):
+        for hilera, indice in zip(self._orden_hilera, self._orden_indice):
+            yield self.filas[hilera].vista(indice)
+
+    def __len__(self):
+        return len(self._orden_hilera)
+
+    @property
+    def tamano(self):
+        return len(self._orden_hilera)
@@ -0,0 +1,81 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+class CacheLRU:
+    """Cache LRU acotada y segura entre hilos, con contadores de uso."""
+
+    def __init__(self, capacidad=32):
+        self.capacidad = capacidad
+        self._entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            resultado = self._entradas.get(clave)
+            if resultado is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return resultado
+
+    def guardar(self, clave, resultado):
+        with self._lock:
+            self._entradas[clave] = resultado
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+                self.desalojos += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def descartar(self, condicion):
+        # Quita las entradas cuya clave cumple la condición; devuelve cuántas
+        with self._lock:
+            claves = [clave for clave in self._entradas if condicion(clave)]
+            for clave in claves:
+                del self._entradas[clave]
+            return len(claves)
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, clave):
+        # No cuenta como acierto ni fallo ni cambia el orden LRU
+        with self._lock:
+            return clave in self._entradas
+
+    def estadisticas(self):
+        return {
+            'capacidad': self.capacidad,
+            'entradas': len(self._entradas),
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'desalojos': self.desalojos,
+        }
+
+class CacheSimulaciones(CacheLRU):
+    """Cache LRU de resultados de simulación, direccionada por contenido.
+
+    La clave es un hash de lo que determina el resultado: drones,
+    asignaciones por hilera y la secuencia de plantas del plan (con su
+    agua y fertilizante). Dos planes con el mismo contenido comparten
+    resultado sin importar su nombre.
+    """
+
+    @staticmethod
+    def clave(invernadero, plan):
+        h = hashlib.sha256()
+        for dron in invernadero.drones:
+            h.update(f"D{dron.id_dron}|{dron.nombre};".encode('utf-8'))
+        for hilera, dron_id in invernadero.asignaciones.items():
+            h.update(f"A{hilera}|{dron_id};".encode('utf-8'))
+        for planta in plan.secuencia_plantas:
+            h.update(f"P{planta.hilera}|{planta.posicion}|{planta.litros_agua}|{planta.gramos_fertilizante};".encode('utf-8'))
+        return h.hexdigest()
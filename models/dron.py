@@ -1,21 +1,30 @@
 class Dron:
+    # Modelo inmutable: el mismo Dron se comparte entre simulaciones concurrentes
+    __slots__ = ('id_dron', 'nombre')
+
     def __init__(self, id_dron, nombre):
-        self.id_dron = id_dron
-        self.nombre = nombre
-        self.posicion_actual = 0
-        self.agua_usada = 0
-        self.fertilizante_usado = 0
-        self.plantas_regadas = []
-        self.estado = "Esperando"
-        self.hilera_asignada = None
+        object.__setattr__(self, 'id_dron', id_dron)
+        object.__setattr__(self, 'nombre', nombre)
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError(f"Dron es inmutable, no se puede asignar '{nombre}'")
+
+    def __reduce__(self):
+        return (Dron, (self.id_dron, self.nombre))
+
+    def __str__(self):
+        return self.nombre
 
-    def reset(self):
-        self.posicion_actual = 0
+class EstadoDron:
+    # Estado de un dron durante una simulación; cada corrida tiene el suyo
+    # Las posiciones por segundo las llevan MotorRiego.ticks y HistorialTDA
+    def __init__(self, dron):
+        self.dron = dron
+        self.nombre = dron.nombre
         self.agua_usada = 0
         self.fertilizante_usado = 0
         self.plantas_regadas = []
         self.estado = "Esperando"
-        self.hilera_asignada = None
 
     def regar_planta(self, planta):
         self.agua_usada += planta.litros_agua
@@ -24,4 +33,4 @@ class Dron:
         self.estado = "Regando"
         
     def __str__(self):
-        return f"{self.nombre} (Pos: {self.posicion_actual})"
\ No newline at end of file
+        return f"{self.nombre} ({self.estado}, {len(self.plantas_regadas)} plantas regadas)"
@@ -0,0 +1,97 @@
+from .plan import PlanRiego
+from .tda import ListaEnlazada
+from .metricas import logger
+
+def fusionar_configuracion(actuales, subidos):
+    """Fusiona una configuración subida con la cargada, por nombre de
+    invernadero y de plan.
+
+    Lo que no viene en el archivo se conserva; lo que viene se agrega o,
+    si cambió, reemplaza a lo anterior. Si un nombre se repite cuenta el
+    primero. Devuelve (lista fusionada, cambios); cambios['descartados']
+    tiene los pares (invernadero, plan) anteriores que dejaron de aplicar.
+    """
+    cambios = {
+        'invernaderos_agregados': [],
+        'invernaderos_modificados': [],
+        'planes_agregados': [],
+        'planes_modificados': [],
+        'descartados': [],
+    }
+    por_nombre = {}
+    for invernadero in subidos:
+        por_nombre.setdefault(invernadero.nombre, invernadero)
+
+    fusionados = ListaEnlazada()
+    vistos = set()
+    for actual in actuales:
+        subido = por_nombre.get(actual.nombre)
+        if subido is None or actual.nombre in vistos:
+            fusionados.agregar(actual)
+            continue
+        vistos.add(actual.nombre)
+        fusionados.agregar(_fusionar_invernadero(actual, subido, cambios))
+    for subido in subidos:
+        if subido.nombre not in vistos:
+            vistos.add(subido.nombre)
+            fusionados.agregar(subido)
+            cambios['invernaderos_agregados'].append(subido.nombre)
+    return fusionados, cambios
+
+def _fusionar_invernadero(actual, subido, cambios):
+    if not actual.misma_base(subido):
+        # Cambiaron plantas, drones o asignaciones: ningún plan anterior sirve
+        # tal cual; los que no vienen en el archivo se pasan a las plantas nuevas
+        cambios['invernaderos_modificados'].append(actual.nombre)
+        cambios['descartados'].extend((actual, plan) for plan in actual.planes)
+        nombres = {plan.nombre for plan in subido.planes}
+        conservados = [_trasladar(plan, subido) for plan in actual.planes if plan.nombre not in nombres]
+        if not conservados:
+            return subido
+        return subido.con_planes(list(subido.planes) + conservados)
+
+    por_nombre = {}
+    for plan in subido.planes:
+        por_nombre.setdefault(plan.nombre, plan)
+    planes = []
+    usados = set()
+    modificado = False
+    for plan in actual.planes:
+        nuevo = por_nombre.get(plan.nombre)
+        if nuevo is None or plan.nombre in usados:
+            planes.append(plan)
+            continue
+        usados.add(plan.nombre)
+        if _misma_secuencia(plan, nuevo):
+            planes.append(plan)
+        else:
+            planes.append(_trasladar(nuevo, actual))
+            cambios['planes_modificados'].append(f"{actual.nombre}/{plan.nombre}")
+            cambios['descartados'].append((actual, plan))
+            modificado = True
+    nombres_actuales = {plan.nombre for plan in actual.planes}
+    for nombre, plan in por_nombre.items():
+        if nombre not in nombres_actuales:
+            planes.append(_trasladar(plan, actual))
+            cambios['planes_agregados'].append(f"{actual.nombre}/{nombre}")
+            modificado = True
+    return actual.con_planes(planes) if modificado else actual
+
+def _misma_secuencia(plan, otro):
+    # Con la misma base, hilera y posición determinan la planta
+    if len(plan.secuencia_plantas) != len(otro.secuencia_plantas):
+        return False
+    return all(a.hilera == b.hilera and a.posicion == b.posicion
+               for a, b in zip(plan.secuencia_plantas, otro.secuencia_plantas))
+
+def _trasladar(plan, invernadero):
+    # El mismo plan sobre las plantas de invernadero
+    secuencia = ListaEnlazada()
+    for planta in plan.secuencia_plantas:
+        encontrada = invernadero.buscar_planta(planta.hilera, planta.posicion)
+        if encontrada:
+            secuencia.agregar(encontrada)
+        else:
+            logger.warning("Planta %s no encontrada en invernadero %s, se omite del plan %s",
+                           planta, invernadero.nombre, plan.nombre)
+    return PlanRiego(plan.nombre, secuencia)
@@ -0,0 +1,159 @@
+import shutil
+from xml.sax.saxutils import escape
+
+from graphviz import Digraph, pipe
+
+from .cache import CacheLRU
+from .metricas import metricas
+from .salida import atributo
+
+def digraph_estado(estado, t):
+    """Digraph de Graphviz con el estado de los TDAs en el tiempo t."""
+    dot = Digraph(comment=f'Estado de TDAs en tiempo t={t}')
+    dot.attr(rankdir='LR', fontname='Arial', fontsize='12')
+    dot.node('plan', 'Plan de Riego', shape='ellipse', style='filled', color='lightblue')
+
+    if not estado:
+        dot.node('error', f'No hay estado para t={t}', shape='box', style='filled', color='lightcoral')
+        return dot
+
+    for nombre, pos, estado_dron in estado['drones']:
+        dron_id = f'dron_{nombre}'
+        dot.node(dron_id, f'{nombre}\\nPos: {pos}\\nEstado: {estado_dron}',
+                 shape='box', style='filled', color='lightskyblue')
+        dot.edge('plan', dron_id)
+
+        accion = estado['acciones'].get(nombre, 'Esperar')
+        accion_id = f'accion_{nombre}_{t}'
+        dot.node(accion_id, accion, shape='box', style='filled', color='lightpink')
+        dot.edge(dron_id, accion_id)
+    return dot
+
+def svg_graphviz_lote(estados):
+    """Renderiza varios (estado, t) con un solo proceso dot.
+
+    dot acepta varios grafos en la misma entrada y escribe un SVG por
+    cada uno, en orden; la salida se separa por el cierre </svg>.
+    """
+    fuente = "\n".join(digraph_estado(estado, t).source for estado, t in estados)
+    salida = pipe('dot', 'svg', fuente.encode('utf-8')).decode('utf-8')
+    partes = salida.split('</svg>')
+    return [parte.lstrip('\n') + '</svg>\n' for parte in partes[:len(estados)]]
+
+# Dimensiones del dibujo en Python puro (puntos, como Graphviz)
+_LINEA = 16
+_CARACTER = 7.5
+_MARGEN = 8
+_SEPARACION_X = 50
+_SEPARACION_Y = 14
+
+def _caja(x, y, ancho, alto, lineas, color, forma='box'):
+    partes = []
+    if forma == 'ellipse':
+        partes.append(f'<ellipse fill="{color}" stroke="{color}" cx="{x + ancho / 2:.1f}" cy="{y + alto / 2:.1f}" '
+                      f'rx="{ancho / 2:.1f}" ry="{alto / 2:.1f}"/>')
+    else:
+        partes.append(f'<rect fill="{color}" stroke="{color}" x="{x:.1f}" y="{y:.1f}" '
+                      f'width="{ancho:.1f}" height="{alto:.1f}"/>')
+    primera = y + alto / 2 - (len(lineas) - 1) * _LINEA / 2 + 5
+    for k, linea in enumerate(lineas):
+        partes.append(f'<text text-anchor="middle" x="{x + ancho / 2:.1f}" y="{primera + k * _LINEA:.1f}" '
+                      f'font-family="Times,serif" font-size="14.00">{escape(linea)}</text>')
+    return partes
+
+def _medida(lineas):
+    ancho = max(54, max(len(linea) for linea in lineas) * _CARACTER + 2 * _MARGEN)
+    alto = max(36, len(lineas) * _LINEA + 2 * _MARGEN)
+    return ancho, alto
+
+def _flecha(x1, y1, x2, y2):
+    return (f'<path fill="none" stroke="black" d="M{x1:.1f},{y1:.1f}L{x2:.1f},{y2:.1f}" '
+            f'marker-end="url(#flecha)"/>')
+
+def svg_python(estado, t):
+    """Mismo grafo que digraph_estado dibujado en Python, sin lanzar dot.
+
+    La distribución es fija: el plan a la izquierda, una fila por dron y su
+    acción a la derecha.
+    """
+    plan = ['Plan de Riego']
+    if not estado:
+        filas = [([f'No hay estado para t={t}'], None, 'lightcoral')]
+    else:
+        filas = [([nombre, f'Pos: {pos}', f'Estado: {estado_dron}'],
+                  [estado['acciones'].get(nombre, 'Esperar')], 'lightskyblue')
+                 for nombre, pos, estado_dron in estado['drones']]
+
+    ancho_plan, alto_plan = _medida(plan)
+    ancho_plan *= 1.2
+    ancho_dron = max([_medida(lineas)[0] for lineas, _, _ in filas] or [0])
+    ancho_accion = max([_medida(accion)[0] for _, accion, _ in filas if accion] or [0])
+    altos = [max(_medida(lineas)[1], _medida(accion)[1] if accion else 0) for lineas, accion, _ in filas]
+
+    alto = max(alto_plan, sum(altos) + _SEPARACION_Y * (len(filas) - 1)) + 2 * _MARGEN
+    x_dron = _MARGEN + ancho_plan + _SEPARACION_X
+    x_accion = x_dron + ancho_dron + _SEPARACION_X
+    ancho = (x_accion + ancho_accion if ancho_accion else x_dron + ancho_dron) + _MARGEN
+    y_plan = (alto - alto_plan) / 2
+
+    cuerpo = ['<defs><marker id="flecha" markerWidth="10" markerHeight="7" refX="10" refY="3.5" orient="auto">'
+              '<polygon points="0 0, 10 3.5, 0 7"/></marker></defs>',
+              f'<title>{escape(f"Estado de TDAs en tiempo t={t}")}</title>']
+    cuerpo += _caja(_MARGEN, y_plan, ancho_plan, alto_plan, plan, 'lightblue', 'ellipse')
+
+    y = _MARGEN
+    for (lineas, accion, color), alto_fila in zip(filas, altos):
+        ancho_caja, alto_caja = _medida(lineas)
+        y_caja = y + (alto_fila - alto_caja) / 2
+        if accion is None:
+            # El nodo de error no tiene aristas en el grafo original
+            cuerpo += _caja(x_dron, y_caja, ancho_caja, alto_caja, lineas, color)
+        else:
+            cuerpo.append(_flecha(_MARGEN + ancho_plan, y_plan + alto_plan / 2, x_dron, y_caja + alto_caja / 2))
+            cuerpo += _caja(x_dron, y_caja, ancho_caja, alto_caja, lineas, color)
+            ancho_a, alto_a = _medida(accion)
+            y_a = y + (alto_fila - alto_a) / 2
+            cuerpo.append(_flecha(x_dron + ancho_caja, y_caja + alto_caja / 2, x_accion, y_a + alto_a / 2))
+            cuerpo += _caja(x_accion, y_a, ancho_a, alto_a, accion, 'lightpink')
+        y += alto_fila + _SEPARACION_Y
+
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{ancho:.0f}pt" height="{alto:.0f}pt" '
+            f'viewBox="0 0 {ancho:.1f} {alto:.1f}" data-t="{atributo(str(t))}">\n'
+            + "\n".join(cuerpo) + '\n</svg>\n')
+
+class RenderizadorGraficos:
+    """SVG del estado de los TDAs por (simulación, t), con cache LRU.
+
+    motor: 'graphviz' (proceso dot), 'python' (sin subprocesos) o 'auto',
+    que usa Graphviz solo si el ejecutable dot está instalado.
+    """
+
+    def __init__(self, capacidad=2048, motor='auto'):
+        if motor == 'auto':
+            motor = 'graphviz' if shutil.which('dot') else 'python'
+        if motor not in ('graphviz', 'python'):
+            raise ValueError(f"Motor de gráficos desconocido: {motor}")
+        self.motor = motor
+        self.cache = CacheLRU(capacidad)
+
+    def obtener(self, simulador, clave, t):
+        svg = self.cache.obtener((clave, t))
+        if svg is None:
+            self.prerenderizar(simulador, clave, [t])
+            svg = self.cache.obtener((clave, t))
+        return svg
+
+    def prerenderizar(self, simulador, clave, tiempos):
+        """Renderiza en un solo lote los tiempos que aún no están en cache."""
+        faltantes = [t for t in tiempos if (clave, t) not in self.cache]
+        if not faltantes:
+            return
+        with metricas.medir('grafico'):
+            estados = [(simulador.historial.estado(t), t) for t in faltantes]
+            if self.motor == 'graphviz':
+                svgs = svg_graphviz_lote(estados)
+            else:
+                svgs = [svg_python(estado, t) for estado, t in estados]
+        metricas.incrementar('graficos_renderizados', len(faltantes))
+        for t, svg in zip(faltantes, svgs):
+            self.cache.guardar((clave, t), svg)
@@ -0,0 +1,101 @@
+from array import array
+
+class HistorialTDA:
+    """Historial columnar de la simulación con acceso O(1) por tiempo.
+
+    Por cada segundo y dron se guarda el código de su acción (las cadenas
+    se internan en una tabla) y el cambio de posición respecto al segundo
+    anterior. Cada BLOQUE segundos se guarda la posición absoluta, así que
+    reconstruir cualquier t suma como mucho BLOQUE - 1 deltas.
+    """
+
+    BLOQUE = 64
+
+    def __init__(self, nombres_drones):
+        self.nombres = list(nombres_drones)
+        self._n = len(self.nombres)
+        self._tabla = []  # código -> acción
+        self._codigo_de = {}  # acción -> código
+        self._codigos = array('H')
+        self._deltas = array('b')
+        self._puntos = array('I')  # posiciones absolutas al inicio de cada bloque
+        self._ultimas = [0] * self._n
+        self._primer_riego = [None] * self._n
+        self._tiempos = 0
+
+    def _codigo(self, accion):
+        codigo = self._codigo_de.get(accion)
+        if codigo is None:
+            codigo = len(self._tabla)
+            self._tabla.append(accion)
+            self._codigo_de[accion] = codigo
+            if codigo > 0xFFFF and self._codigos.typecode == 'H':
+                self._codigos = array('I', self._codigos)
+        return codigo
+
+    def agregar(self, acciones, posiciones, estados):
+        self._tiempos += 1
+        if (self._tiempos - 1) % self.BLOQUE == 0:
+            self._puntos.extend(posiciones)
+        for i, nombre in enumerate(self.nombres):
+            self._codigos.append(self._codigo(acciones.get(nombre, 'Esperar')))
+            self._deltas.append(posiciones[i] - self._ultimas[i])
+            self._ultimas[i] = posiciones[i]
+            if self._primer_riego[i] is None and estados[i] == 'Regando':
+                self._primer_riego[i] = self._tiempos
+
+    def copiar_hasta(self, t):
+        """Nuevo historial con los primeros t segundos de este."""
+        t = max(0, min(t, self._tiempos))
+        copia = HistorialTDA(self.nombres)
+        copia._tabla = list(self._tabla)
+        copia._codigo_de = dict(self._codigo_de)
+        copia._codigos = self._codigos[:t * self._n]
+        copia._deltas = self._deltas[:t * self._n]
+        bloques = (t + self.BLOQUE - 1) // self.BLOQUE
+        copia._puntos = self._puntos[:bloques * self._n]
+        copia._ultimas = self.posiciones(t) if t else [0] * self._n
+        copia._primer_riego = [p if p is not None and p <= t else None for p in self._primer_riego]
+        copia._tiempos = t
+        return copia
+
+    def __len__(self):
+        return self._tiempos
+
+    def acciones(self, t):
+        if t < 1 or t > self._tiempos:
+            return None
+        base = (t - 1) * self._n
+        return {nombre: self._tabla[self._codigos[base + i]] for i, nombre in enumerate(self.nombres)}
+
+    def posiciones(self, t):
+        if t < 1 or t > self._tiempos:
+            return None
+        bloque = (t - 1) // self.BLOQUE
+        posiciones = list(self._puntos[bloque * self._n:(bloque + 1) * self._n])
+        for k in range(bloque * self.BLOQUE + 1, t):
+            base = k * self._n
+            for i in range(self._n):
+                posiciones[i] += self._deltas[base + i]
+        return posiciones
+
+    def estado(self, t):
+        acciones = self.acciones(t)
+        if acciones is None:
+            return None
+        posiciones = self.posiciones(t)
+        drones = []
+        for i, nombre in enumerate(self.nombres):
+            primer = self._primer_riego[i]
+            estado = 'Regando' if primer is not None and t >= primer else 'Esperando'
+            drones.append((nombre, posiciones[i], estado))
+        return {'tiempo': t, 'acciones': acciones, 'drones': drones}
+
+    def rango(self, desde, hasta):
+        # Segundos desde..hasta (inclusive) con el formato de __iter__
+        for t in range(max(desde, 1), min(hasta, self._tiempos) + 1):
+            yield {'tiempo': t, 'acciones': self.acciones(t)}
+
+    def __iter__(self):
+        # Mismo formato que instrucciones_por_tiempo: {'tiempo', 'acciones'}
+        return self.rango(1, self._tiempos)
@@ -0,0 +1,81 @@
+import os
+import pickle
+import tempfile
+import threading
+
+from .metricas import logger, metricas
+
+class InstantaneaConfiguracion:
+    """Copia binaria en disco de la configuración cargada.
+
+    Al subir un XML se guarda la lista de invernaderos ya parseada con
+    pickle; cada proceso la lee al primer uso, así que arrancar no depende
+    de volver a parsear el XML. El archivo se reemplaza de forma atómica y
+    su versión es (inodo, mtime, tamaño): un proceso detecta la carga de
+    otro con un solo os.stat por solicitud.
+
+    El archivo empieza con una cabecera y el número de FORMATO; las copias
+    de otro formato (modelos anteriores) o dañadas se ignoran y se
+    conserva la configuración actual.
+    """
+
+    CABECERA = b'GUATERIEGOS-INSTANTANEA '
+    FORMATO = 2  # Subirlo al cambiar los modelos que se guardan
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.version = None
+        self._lock = threading.Lock()
+
+    def _version_en_disco(self):
+        try:
+            info = os.stat(self.ruta)
+        except FileNotFoundError:
+            return None
+        return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+    def guardar(self, invernaderos):
+        directorio = os.path.dirname(self.ruta) or '.'
+        os.makedirs(directorio, exist_ok=True)
+        with metricas.medir('instantanea_guardar'):
+            descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+            try:
+                with os.fdopen(descriptor, 'wb') as f:
+                    f.write(self.CABECERA + b'%d\n' % self.FORMATO)
+                    pickle.dump(invernaderos, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporal, self.ruta)
+            except BaseException:
+                os.unlink(temporal)
+                raise
+        with self._lock:
+            self.version = self._version_en_disco()
+
+    def cargar_si_cambio(self):
+        """Devuelve la configuración si la versión en disco es otra que la
+        última vista por este proceso; si no, None."""
+        version = self._version_en_disco()
+        if version is None or version == self.version:
+            return None
+        with self._lock:
+            if version == self.version:
+                return None
+            try:
+                with metricas.medir('instantanea_cargar'), open(self.ruta, 'rb') as f:
+                    info = os.fstat(f.fileno())
+                    # Versión del archivo abierto, por si otro proceso lo reemplazó;
+                    # se recuerda aunque falle para no reintentar en cada solicitud
+                    version = (info.st_ino, info.st_mtime_ns, info.st_size)
+                    cabecera = f.readline()
+                    if cabecera != self.CABECERA + b'%d\n' % self.FORMATO:
+                        logger.warning("Copia de configuración %s con otro formato, se ignora", self.ruta)
+                        self.version = version
+                        return None
+                    invernaderos = pickle.load(f)
+            except Exception:
+                logger.exception("No se pudo leer la copia de configuración %s, se conserva la actual", self.ruta)
+                metricas.incrementar('instantanea_errores')
+                self.version = version
+                return None
+            self.version = version
+        logger.info("Configuración cargada desde %s (%d invernaderos)", self.ruta, len(invernaderos))
+        return invernaderos
@@ -1,14 +1,66 @@
 from .tda import ListaEnlazada
+from .almacen import AlmacenPlantas
 
 class Invernadero:
     def __init__(self, nombre, numero_hileras, plantas_x_hilera):
         self.nombre = nombre
         self.numero_hileras = numero_hileras
         self.plantas_x_hilera = plantas_x_hilera
-        self.plantas = ListaEnlazada()
+        self.plantas = AlmacenPlantas()  # arreglos por hilera
         self.drones = ListaEnlazada()
         self.asignaciones = {}  # hilera -> dron_id
         self.planes = ListaEnlazada()  #  Ahora está correctamente indentado
+        self._congelado = False
+
+    def congelar(self):
+        # Terminada la carga el modelo es de solo lectura: las simulaciones
+        # guardan su estado aparte y pueden correr en paralelo sin copias
+        self._congelado = True
+
+    def _verificar_mutable(self):
+        if self._congelado:
+            raise AttributeError(f"Invernadero '{self.nombre}' congelado, no se puede modificar")
 
     def asignar_dron_a_hilera(self, dron_id, hilera):
-        self.asignaciones[hilera] = dron_id
\ No newline at end of file
+        self._verificar_mutable()
+        self.asignaciones[hilera] = dron_id
+
+    def agregar_dron(self, dron):
+        self._verificar_mutable()
+        self.drones.agregar(dron)
+
+    def agregar_planta(self, planta):
+        self._verificar_mutable()
+        self.plantas.agregar(planta)
+
+    def crear_planta(self, hilera, posicion, litros_agua, gramos_fertilizante, nombre):
+        # Como agregar_planta, pero sin crear antes una Planta suelta
+        self._verificar_mutable()
+        self.plantas.crear(hilera, posicion, litros_agua, gramos_fertilizante, nombre)
+
+    def agregar_plan(self, plan):
+        self._verificar_mutable()
+        self.planes.agregar(plan)
+
+    def misma_base(self, otro):
+        # Todo menos los planes: medidas, plantas, drones y asignaciones
+        return (self.numero_hileras == otro.numero_hileras
+                and self.plantas_x_hilera == otro.plantas_x_hilera
+                and self.asignaciones == otro.asignaciones
+                and [(d.id_dron, d.nombre) for d in self.drones] == [(d.id_dron, d.nombre) for d in otro.drones]
+                and self.plantas.mismo_contenido(otro.plantas))
+
+    def con_planes(self, planes):
+        # Copia congelada que comparte plantas, drones y asignaciones (de solo
+        # lectura) pero con otra lista de planes
+        copia = Invernadero(self.nombre, self.numero_hileras, self.plantas_x_hilera)
+        copia.plantas = self.plantas
+        copia.drones = self.drones
+        copia.asignaciones = self.asignaciones
+        for plan in planes:
+            copia.planes.agregar(plan)
+        copia.congelar()
+        return copia
+
+    def buscar_planta(self, hilera, posicion):
+        return self.plantas.buscar(hilera, posicion)
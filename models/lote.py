@@ -0,0 +1,110 @@
+import numpy as np
+
+from .motor import drones_y_hileras
+
+class EvaluadorPlanes:
+    """Evalúa muchos planes candidatos sobre un mismo invernadero con NumPy.
+
+    Cada plan es un arreglo entero de forma (n, 2) con pares (hilera,
+    posicion). Se aplica la misma recurrencia de MotorRiego (el dron sale
+    tras su riego anterior y riega al llegar, uno por segundo en el orden
+    del plan), pero cada paso del plan se calcula a la vez para todos los
+    planes. Las referencias a plantas inexistentes o a hileras sin dron
+    se omiten, igual que en la carga y en la simulación.
+    """
+
+    def __init__(self, invernadero):
+        self.invernadero = invernadero
+
+        # Drones sin repetidos y hilera que recorre cada uno (como MotorRiego)
+        self.drones, hilera_a_dron, hileras = drones_y_hileras(invernadero)
+
+        # Tablas densas indexadas por [hilera, posicion]
+        max_hilera = max([p.hilera for p in invernadero.plantas] + list(hilera_a_dron) + [0])
+        max_posicion = max([p.posicion for p in invernadero.plantas] + [0])
+        self._dron = np.full((max_hilera + 1, max_posicion + 1), -1, dtype=np.int64)
+        self._agua = np.zeros((max_hilera + 1, max_posicion + 1))
+        self._fertilizante = np.zeros((max_hilera + 1, max_posicion + 1))
+        vistas = set()
+        for planta in invernadero.plantas:
+            clave = (planta.hilera, planta.posicion)
+            if clave in vistas:
+                continue  # La primera planta con esa posición es la que se usa
+            vistas.add(clave)
+            i = hilera_a_dron.get(planta.hilera)
+            if i is not None and hileras[i] == planta.hilera:
+                self._dron[clave] = i
+            self._agua[clave] = planta.litros_agua
+            self._fertilizante[clave] = planta.gramos_fertilizante
+
+        # Índices de invernadero.drones (con repetidos) para sumar como Simulador
+        indice_por_nombre = {d.nombre: i for i, d in enumerate(self.drones)}
+        self._sumandos = [indice_por_nombre[d.nombre] for d in invernadero.drones]
+
+    @staticmethod
+    def plan_a_arreglo(plan):
+        return np.array([(p.hilera, p.posicion) for p in plan.secuencia_plantas],
+                        dtype=np.int64).reshape(-1, 2)
+
+    def evaluar(self, planes):
+        """Devuelve un dict de arreglos con una fila por plan:
+        tiempo_total, agua_total, fertilizante_total, agua_por_dron y
+        fertilizante_por_dron (columnas en el orden de self.drones)."""
+        num_planes = len(planes)
+        largo = max([len(plan) for plan in planes] + [0])
+        num_drones = len(self.drones)
+
+        hilera = np.zeros((num_planes, largo), dtype=np.int64)
+        posicion = np.zeros((num_planes, largo), dtype=np.int64)
+        valido = np.zeros((num_planes, largo), dtype=bool)
+        for b, plan in enumerate(planes):
+            plan = np.asarray(plan, dtype=np.int64).reshape(-1, 2)
+            n = len(plan)
+            hilera[b, :n] = plan[:, 0]
+            posicion[b, :n] = plan[:, 1]
+            valido[b, :n] = True
+
+        # Referencias fuera de la tabla o sin dron quedan inválidas
+        dentro = ((hilera >= 0) & (hilera < self._dron.shape[0])
+                  & (posicion >= 0) & (posicion < self._dron.shape[1]))
+        valido &= dentro
+        hilera = np.where(valido, hilera, 0)
+        posicion = np.where(valido, posicion, 0)
+        dron = self._dron[hilera, posicion]
+        valido &= dron >= 0
+        dron = np.where(valido, dron, 0)
+
+        # Consumos: no dependen del orden, se acumulan de una vez
+        filas = np.broadcast_to(np.arange(num_planes)[:, None], dron.shape)
+        agua_por_dron = np.zeros((num_planes, num_drones))
+        fertilizante_por_dron = np.zeros((num_planes, num_drones))
+        np.add.at(agua_por_dron, (filas[valido], dron[valido]), self._agua[hilera, posicion][valido])
+        np.add.at(fertilizante_por_dron, (filas[valido], dron[valido]),
+                  self._fertilizante[hilera, posicion][valido])
+
+        # Tiempos: recurrencia secuencial en el plan, vectorizada entre planes
+        todos = np.arange(num_planes)
+        ultimo_tiempo = np.zeros((num_planes, max(num_drones, 1)), dtype=np.int64)
+        ultima_pos = np.zeros((num_planes, max(num_drones, 1)), dtype=np.int64)
+        tiempo_anterior = np.zeros(num_planes, dtype=np.int64)
+        for k in range(largo):
+            d = dron[:, k]
+            p = posicion[:, k]
+            llegada = ultimo_tiempo[todos, d] + np.abs(p - ultima_pos[todos, d])
+            tiempo = np.maximum(llegada, tiempo_anterior + 1)
+            activo = valido[:, k]
+            ultimo_tiempo[todos, d] = np.where(activo, tiempo, ultimo_tiempo[todos, d])
+            ultima_pos[todos, d] = np.where(activo, p, ultima_pos[todos, d])
+            tiempo_anterior = np.where(activo, tiempo, tiempo_anterior)
+
+        # Tras su último riego cada dron regresa a la posición 0
+        tiempo_total = np.maximum(tiempo_anterior, (ultimo_tiempo + ultima_pos).max(axis=1))
+
+        return {
+            'tiempo_total': tiempo_total,
+            'agua_total': agua_por_dron[:, self._sumandos].sum(axis=1),
+            'fertilizante_total': fertilizante_por_dron[:, self._sumandos].sum(axis=1),
+            'agua_por_dron': agua_por_dron,
+            'fertilizante_por_dron': fertilizante_por_dron,
+            'drones': [d.nombre for d in self.drones],
+        }
@@ -0,0 +1,47 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('guateriegos')
+
+class Metricas:
+    """Temporizadores por fase y contadores acumulados del proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fases = {}  # fase -> [llamadas, segundos_total, segundos_max]
+        self._contadores = {}
+
+    @contextmanager
+    def medir(self, fase):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            duracion = time.perf_counter() - inicio
+            with self._lock:
+                datos = self._fases.setdefault(fase, [0, 0.0, 0.0])
+                datos[0] += 1
+                datos[1] += duracion
+                datos[2] = max(datos[2], duracion)
+            logger.debug("Fase %s: %.4f s", fase, duracion)
+
+    def incrementar(self, contador, cantidad=1):
+        with self._lock:
+            self._contadores[contador] = self._contadores.get(contador, 0) + cantidad
+
+    def instantanea(self):
+        with self._lock:
+            return {
+                'fases': {fase: {'llamadas': n, 'segundos_total': round(total, 6), 'segundos_max': round(maximo, 6)}
+                          for fase, (n, total, maximo) in self._fases.items()},
+                'contadores': dict(self._contadores),
+            }
+
+    def reiniciar(self):
+        with self._lock:
+            self._fases.clear()
+            self._contadores.clear()
+
+metricas = Metricas()
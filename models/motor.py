@@ -0,0 +1,212 @@
+import bisect
+
+from .metricas import logger
+
+def drones_y_hileras(invernadero):
+    """Devuelve (drones, hilera_a_dron, hileras) con la regla que comparten
+    MotorRiego y EvaluadorPlanes.
+
+    drones va en el orden del invernadero sin repetidos por nombre; si dos
+    drones comparten id cuenta el primero. hilera_a_dron mapea cada hilera
+    asignada al índice de su dron y hileras[i] es la hilera que recorre el
+    dron i: la última que se le asignó.
+    """
+    drones = []
+    vistos = set()
+    for dron in invernadero.drones:
+        if dron.nombre not in vistos:
+            vistos.add(dron.nombre)
+            drones.append(dron)
+    indice_por_id = {}
+    for i, dron in enumerate(drones):
+        indice_por_id.setdefault(dron.id_dron, i)
+
+    hilera_a_dron = {}
+    hileras = [None] * len(drones)
+    for hilera, dron_id in invernadero.asignaciones.items():
+        i = indice_por_id.get(dron_id)
+        if i is not None:
+            hilera_a_dron[hilera] = i
+            hileras[i] = hilera
+    return drones, hilera_a_dron, hileras
+
+class MotorRiego:
+    """Motor de simulacion dirigido por eventos de riego.
+
+    Precalcula las plantas regables del plan y el tiempo exacto de cada
+    riego, también agrupado por dron en riegos_por_dron, de modo que el
+    costo de planificar es proporcional al largo del plan. Las
+    instrucciones por segundo se derivan despues de esos eventos con el
+    mismo formato que generaba el ciclo tick a tick original.
+
+    Cada INTERVALO_CONTROL plantas del plan se guarda un punto de control
+    (tiempos, posiciones y consumos por dron). Con base=otro motor del
+    mismo invernadero, la programación retoma desde el último punto de
+    control anterior a la primera planta que cambió.
+    """
+
+    INTERVALO_CONTROL = 256
+
+    def __init__(self, invernadero, plan, base=None):
+        self.invernadero = invernadero
+        self.plan = plan
+
+        self.drones, self.hilera_a_dron, self.hileras = drones_y_hileras(invernadero)
+
+        # Plantas del plan que algún dron recorre, en orden
+        self.plantas = []
+        omitidas = 0
+        primera_omitida = None
+        for planta in plan.secuencia_plantas:
+            i = self.hilera_a_dron.get(planta.hilera)
+            if i is None or self.hileras[i] != planta.hilera:
+                omitidas += 1
+                primera_omitida = primera_omitida or planta
+                continue
+            self.plantas.append(planta)
+        if omitidas:
+            # Un solo aviso por plan: un plan grande puede omitir miles
+            logger.warning("Plan %s: %d plantas sin dron que las recorra se omiten (la primera H%s-P%s)",
+                           plan.nombre, omitidas, primera_omitida.hilera, primera_omitida.posicion)
+
+        self.eventos = []  # (tiempo, indice_dron, planta)
+        self.riegos_por_dron = [[] for _ in self.drones]  # (tiempo, posicion)
+        self.tiempo_total = 0
+        # (indice_plan, tiempo_anterior, ultimo_tiempo, ultima_pos, conteos, agua, fertilizante)
+        self.puntos_control = []
+        self.punto_inicial = None  # punto de control de base desde el que se retomó
+        self.reanudado_desde = 0  # primer índice de self.plantas programado aquí
+        self.tiempo_conservado = 0  # segundos iniciales idénticos a los de base
+        self._programar(base)
+
+    def _punto_de_reanudacion(self, base):
+        if base is None or base.invernadero is not self.invernadero or not base.puntos_control:
+            return None
+        cambio = 0
+        limite = min(len(base.plantas), len(self.plantas))
+        while cambio < limite and base.plantas[cambio] is self.plantas[cambio]:
+            cambio += 1
+        indices = [punto[0] for punto in base.puntos_control]
+        return bisect.bisect_right(indices, cambio) - 1
+
+    def _programar(self, base):
+        n = len(self.drones)
+        k = self._punto_de_reanudacion(base)
+        if k is None:
+            inicio, tiempo_anterior = 0, 0
+            ultimo_tiempo, ultima_pos = [0] * n, [0] * n
+            conteos, agua, fertilizante = [0] * n, [0] * n, [0] * n
+        else:
+            punto = base.puntos_control[k]
+            inicio, tiempo_anterior = punto[0], punto[1]
+            ultimo_tiempo, ultima_pos, conteos, agua, fertilizante = (list(v) for v in punto[2:])
+            self.punto_inicial = punto
+            self.puntos_control = base.puntos_control[:k]
+            self.eventos = base.eventos[:inicio]
+            self.riegos_por_dron = [riegos[:conteos[i]] for i, riegos in enumerate(base.riegos_por_dron)]
+        self.reanudado_desde = inicio
+
+        for indice in range(inicio, len(self.plantas)):
+            if indice % self.INTERVALO_CONTROL == 0:
+                self.puntos_control.append((indice, tiempo_anterior, tuple(ultimo_tiempo), tuple(ultima_pos),
+                                            tuple(conteos), tuple(agua), tuple(fertilizante)))
+            planta = self.plantas[indice]
+            i = self.hilera_a_dron[planta.hilera]
+            # El dron sale tras su riego anterior; riega al llegar y cuando
+            # el riego previo del plan ya se hizo (uno por segundo)
+            llegada = ultimo_tiempo[i] + abs(planta.posicion - ultima_pos[i])
+            tiempo = max(llegada, tiempo_anterior + 1)
+            self.eventos.append((tiempo, i, planta))
+            self.riegos_por_dron[i].append((tiempo, planta.posicion))
+            ultimo_tiempo[i] = tiempo
+            ultima_pos[i] = planta.posicion
+            conteos[i] += 1
+            agua[i] += planta.litros_agua
+            fertilizante[i] += planta.gramos_fertilizante
+            tiempo_anterior = tiempo
+
+        if k is not None:
+            self.tiempo_conservado = self._segundos_conservados(base, self.punto_inicial)
+
+        # Tras su ultimo riego cada dron regresa a la posicion 0
+        self.tiempo_total = tiempo_anterior
+        for riegos in self.riegos_por_dron:
+            if riegos:
+                tiempo, posicion = riegos[-1]
+                self.tiempo_total = max(self.tiempo_total, tiempo + posicion)
+
+    def _segundos_conservados(self, base, punto):
+        # Hasta el último riego previo al punto los segundos no cambian. Un
+        # dron cuyo siguiente objetivo es el mismo en ambos motores (o que no
+        # tiene más riegos en ninguno) se mueve igual hasta ese riego; el que
+        # cambió de objetivo solo conserva hasta su último riego anterior
+        _, tiempo_anterior, ultimo_tiempo, _, conteos, _, _ = punto
+        conservado = tiempo_anterior
+        for i, riegos in enumerate(self.riegos_por_dron):
+            previos = base.riegos_por_dron[i]
+            siguiente = riegos[conteos[i]][1] if conteos[i] < len(riegos) else None
+            siguiente_base = previos[conteos[i]][1] if conteos[i] < len(previos) else None
+            if siguiente != siguiente_base:
+                conservado = min(conservado, ultimo_tiempo[i])
+        return conservado
+
+    def ticks(self, desde=1):
+        """Genera (tiempo, acciones, posiciones, estados) para cada segundo
+        a partir de desde."""
+        regador_en = {tiempo: i for tiempo, i, _ in self.eventos if tiempo >= desde}
+        n = len(self.drones)
+        cursor = [0] * n
+        salida_tiempo = [0] * n
+        salida_pos = [0] * n
+        posiciones = [0] * n
+        estados = ["Esperando"] * n
+
+        # Estado de cada dron al final del segundo desde - 1
+        for i, riegos in enumerate(self.riegos_por_dron):
+            cursor[i] = bisect.bisect_left(riegos, (desde,))
+            if cursor[i]:
+                salida_tiempo[i], salida_pos[i] = riegos[cursor[i] - 1]
+                estados[i] = "Regando"
+            pasos = desde - 1 - salida_tiempo[i]
+            if cursor[i] < len(riegos):
+                objetivo = riegos[cursor[i]][1]
+                avance = min(pasos, abs(objetivo - salida_pos[i]))
+                posiciones[i] = salida_pos[i] + avance if objetivo > salida_pos[i] else salida_pos[i] - avance
+            elif riegos:
+                posiciones[i] = max(salida_pos[i] - pasos, 0)
+
+        for tiempo in range(desde, self.tiempo_total + 1):
+            regador = regador_en.get(tiempo)
+            acciones = {}
+            for i, dron in enumerate(self.drones):
+                riegos = self.riegos_por_dron[i]
+                hilera = self.hileras[i]
+                accion = "Esperar"
+                if cursor[i] < len(riegos):
+                    tiempo_riego, objetivo = riegos[cursor[i]]
+                    pasos = tiempo - salida_tiempo[i]
+                    distancia = abs(objetivo - salida_pos[i])
+                    if pasos <= distancia:
+                        if objetivo > salida_pos[i]:
+                            posiciones[i] = salida_pos[i] + pasos
+                            accion = f"Adelante(H{hilera}P{posiciones[i]})"
+                        else:
+                            posiciones[i] = salida_pos[i] - pasos
+                            accion = f"Atrás(H{hilera}P{posiciones[i]})"
+                    if tiempo == tiempo_riego:
+                        accion = "Regar"
+                        estados[i] = "Regando"
+                        cursor[i] += 1
+                        salida_tiempo[i] = tiempo
+                        salida_pos[i] = objetivo
+                    elif regador is not None:
+                        # El riego es exclusivo: los demas se muestran esperando
+                        accion = "Esperar"
+                elif riegos:
+                    # Regreso al inicio despues del ultimo riego
+                    restante = salida_pos[i] - (tiempo - salida_tiempo[i])
+                    if restante >= 0 and posiciones[i] > 0:
+                        posiciones[i] = restante
+                        accion = f"Atrás(H{hilera}P{restante})" if restante > 0 else "FIN"
+                acciones[dron.nombre] = accion
+            yield tiempo, acciones, posiciones, estados
@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .simulador import Simulador
+
+# Configuración cargada en cada proceso trabajador (una sola vez por proceso)
+_invernaderos = None
+
+# Pool del proceso principal y (configuración, trabajadores) con que se creó
+_pool = None
+_pool_clave = None
+_pool_lock = threading.Lock()
+
+def _contexto():
+    # fork copiaría los hilos y locks del servidor (cola de trabajos,
+    # perfilador); forkserver arranca limpio, spawn donde no existe
+    metodos = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in metodos else 'spawn')
+
+def _inicializar(invernaderos):
+    global _invernaderos
+    _invernaderos = invernaderos
+
+def _simular_tarea(tarea):
+    inv_idx, plan_idx = tarea
+    invernadero = _invernaderos.obtener(inv_idx)
+    simulador = Simulador(invernadero, invernadero.planes.obtener(plan_idx))
+    simulador.simular()
+    return simulador.resultado()
+
+def simular_en_paralelo(invernaderos, tareas, trabajadores=None):
+    """Simula cada (inv_idx, plan_idx) de tareas y devuelve sus resultados
+    en el mismo orden. Con un solo trabajador se simula en este proceso.
+
+    El pool se conserva mientras no cambie la configuración: arrancar los
+    procesos y copiarles los invernaderos se paga una vez por carga, no en
+    cada llamada.
+    """
+    if trabajadores is None:
+        trabajadores = os.cpu_count() or 1
+    if min(trabajadores, len(tareas)) <= 1:
+        _inicializar(invernaderos)
+        return [_simular_tarea(tarea) for tarea in tareas]
+    pool = _pool_para(invernaderos, trabajadores)
+    try:
+        return list(pool.map(_simular_tarea, tareas))
+    except BrokenProcessPool:
+        # Un trabajador murió: la próxima llamada arranca un pool nuevo
+        _descartar_pool(pool)
+        raise
+
+def _pool_para(invernaderos, trabajadores):
+    global _pool, _pool_clave
+    with _pool_lock:
+        if _pool is not None and _pool_clave[0] is invernaderos and _pool_clave[1] == trabajadores:
+            return _pool
+        if _pool is not None:
+            # Las tareas ya enviadas al pool anterior terminan igual
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=trabajadores,
+                                    mp_context=_contexto(),
+                                    initializer=_inicializar,
+                                    initargs=(invernaderos,))
+        _pool_clave = (invernaderos, trabajadores)
+        return _pool
+
+def _descartar_pool(pool):
+    global _pool, _pool_clave
+    with _pool_lock:
+        if _pool is pool:
+            _pool, _pool_clave = None, None
+    pool.shutdown(wait=False)
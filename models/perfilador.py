@@ -0,0 +1,86 @@
+import cProfile
+import os
+import re
+import threading
+import time
+
+from .metricas import logger, metricas
+
+class Perfilador:
+    """Perfilado opcional de solicitudes con cProfile.
+
+    Se activa para todas las solicitudes (activo=True) o para las que traen
+    la cabecera indicada con un valor distinto de '0'. Cubre desde el
+    primer before_request hasta el último after_request, así que incluye
+    la carga, la simulación, los reportes y el dibujo de gráficos hechos
+    en el proceso; el trabajo de los pools de procesos no se ve. Cada
+    perfil se guarda como .pstats (se abre con pstats, snakeviz o
+    flameprof) y se conservan solo los max_archivos más recientes.
+    """
+
+    def __init__(self, carpeta, activo=False, cabecera=None, max_archivos=20):
+        self.carpeta = carpeta
+        self.activo = activo
+        self.cabecera = cabecera
+        self.max_archivos = max_archivos
+        # cProfile admite un solo perfilador a la vez por proceso en versiones nuevas
+        self._lock = threading.Lock()
+
+    def instalar(self, app):
+        # Se registra antes que los demás ganchos para que queden dentro del perfil
+        from flask import g, request
+
+        @app.before_request
+        def iniciar_perfil():
+            if not self._solicitado(request):
+                return
+            if not self._lock.acquire(blocking=False):
+                logger.info("Perfil omitido para %s: ya hay otro en curso", request.path)
+                return
+            g.perfil = cProfile.Profile()
+            g.perfil.enable()
+
+        @app.after_request
+        def terminar_perfil(respuesta):
+            nombre = self._terminar(g, request)
+            if nombre:
+                respuesta.headers['X-Perfil'] = nombre
+            return respuesta
+
+        @app.teardown_request
+        def cerrar_perfil(error=None):
+            # Si la vista falló after_request no corre: el perfil se guarda aquí
+            self._terminar(g, request)
+
+    def _solicitado(self, request):
+        if self.activo:
+            return True
+        return bool(self.cabecera) and request.headers.get(self.cabecera, '0') not in ('', '0')
+
+    def _terminar(self, g, request):
+        perfil = g.pop('perfil', None)
+        if perfil is None:
+            return None
+        try:
+            perfil.disable()
+            os.makedirs(self.carpeta, exist_ok=True)
+            endpoint = re.sub(r'[^A-Za-z0-9_]+', '_', request.endpoint or 'desconocido')
+            nombre = f"perfil_{time.strftime('%Y%m%d-%H%M%S')}_{time.time_ns() % 10**9:09d}_{endpoint}.pstats"
+            with metricas.medir('perfil'):
+                perfil.dump_stats(os.path.join(self.carpeta, nombre))
+            self._podar()
+            metricas.incrementar('perfiles')
+            logger.info("Perfil de %s guardado en %s", request.path, nombre)
+            return nombre
+        finally:
+            self._lock.release()
+
+    def _podar(self):
+        perfiles = [entrada for entrada in os.scandir(self.carpeta) if entrada.name.endswith('.pstats')]
+        perfiles.sort(key=lambda entrada: entrada.stat().st_mtime_ns)
+        perfiles = [entrada.path for entrada in perfiles]
+        for ruta in perfiles[:max(len(perfiles) - self.max_archivos, 0)]:
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass  # Otro proceso ya lo quitó
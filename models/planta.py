@@ -1,10 +1,100 @@
+from array import array
+
+class FilaPlantas:
+    """Plantas de una hilera guardadas como arreglos tipados.
+
+    Posición, agua y fertilizante van en arreglos paralelos; el nombre se
+    guarda solo si no es el que pone la carga por defecto. Las Planta son
+    vistas sobre un índice de la fila y se crean una sola vez al pedirlas.
+    """
+
+    __slots__ = ('hilera', 'posiciones', 'agua', 'fertilizante', 'nombres', '_vistas')
+
+    def __init__(self, hilera):
+        self.hilera = hilera
+        self.posiciones = array('q')
+        self.agua = array('d')
+        self.fertilizante = array('d')
+        self.nombres = []  # None = nombre por defecto
+        self._vistas = []
+
+    def agregar(self, posicion, litros_agua, gramos_fertilizante, nombre):
+        self.posiciones.append(posicion)
+        self.agua.append(litros_agua)
+        self.fertilizante.append(gramos_fertilizante)
+        self.nombres.append(None if nombre == self.nombre_por_defecto(posicion) else nombre)
+        self._vistas.append(None)
+        return len(self.posiciones) - 1
+
+    def nombre_por_defecto(self, posicion):
+        return f"Planta H{self.hilera}P{posicion}"
+
+    def vista(self, indice):
+        planta = self._vistas[indice]
+        if planta is None:
+            planta = self._vistas[indice] = Planta.de_fila(self, indice)
+        return planta
+
+    def __len__(self):
+        return len(self.posiciones)
+
+    def mismo_contenido(self, otra):
+        return (self.hilera == otra.hilera and self.posiciones == otra.posiciones and self.agua == otra.agua
+                and self.fertilizante == otra.fertilizante and self.nombres == otra.nombres)
+
+    def __getstate__(self):
+        # Las vistas no se guardan: se recrean al pedirlas
+        return (self.hilera, self.posiciones, self.agua, self.fertilizante, self.nombres)
+
+    def __setstate__(self, estado):
+        self.hilera, self.posiciones, self.agua, self.fertilizante, self.nombres = estado
+        self._vistas = [None] * len(self.posiciones)
+
 class Planta:
+    # Vista inmutable sobre una FilaPlantas: la misma Planta se comparte entre
+    # simulaciones concurrentes y sus datos viven en los arreglos de la fila
+    __slots__ = ('_fila', '_indice')
+
     def __init__(self, hilera, posicion, litros_agua, gramos_fertilizante, nombre):
-        self.hilera = hilera
-        self.posicion = posicion
-        self.litros_agua = litros_agua
-        self.gramos_fertilizante = gramos_fertilizante
-        self.nombre = nombre
+        # Planta suelta: sus datos quedan en una fila propia
+        fila = FilaPlantas(hilera)
+        object.__setattr__(self, '_fila', fila)
+        object.__setattr__(self, '_indice', fila.agregar(posicion, litros_agua, gramos_fertilizante, nombre))
+
+    @classmethod
+    def de_fila(cls, fila, indice):
+        planta = object.__new__(cls)
+        object.__setattr__(planta, '_fila', fila)
+        object.__setattr__(planta, '_indice', indice)
+        return planta
+
+    @property
+    def hilera(self):
+        return self._fila.hilera
+
+    @property
+    def posicion(self):
+        return self._fila.posiciones[self._indice]
+
+    @property
+    def litros_agua(self):
+        return self._fila.agua[self._indice]
+
+    @property
+    def gramos_fertilizante(self):
+        return self._fila.fertilizante[self._indice]
+
+    @property
+    def nombre(self):
+        nombre = self._fila.nombres[self._indice]
+        return nombre if nombre is not None else self._fila.nombre_por_defecto(self.posicion)
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError(f"Planta es inmutable, no se puede asignar '{nombre}'")
+
+    def __reduce__(self):
+        # La fila se serializa una vez y las vistas se vuelven a compartir
+        return (FilaPlantas.vista, (self._fila, self._indice))
 
     def __str__(self):
-        return f"H{self.hilera}-P{self.posicion}"
\ No newline at end of file
+        return f"H{self.hilera}-P{self.posicion}"
@@ -0,0 +1,51 @@
+import csv
+import json
+from xml.sax.saxutils import escape
+
+# Mismo escape de atributos que xml.etree.ElementTree
+_ENTIDADES_ATRIBUTO = {'"': '&quot;', '\r': '&#13;', '\n': '&#10;', '\t': '&#09;'}
+
+def atributo(valor):
+    return escape(valor, _ENTIDADES_ATRIBUTO)
+
+def sangria(nivel):
+    # Salto de línea e indentación que deja ET.indent(space="  ")
+    return "\n" + "  " * nivel
+
+def iter_salida_xml(simuladores):
+    """Genera salida.xml en fragmentos, byte a byte igual a construir el árbol
+    con generar_xml_salida, aplicar ET.indent y escribirlo con ET.write."""
+    yield "<?xml version='1.0' encoding='utf-8'?>\n<datosSalida>"
+    vacio = True
+    for simulador in simuladores:
+        if vacio:
+            yield f"{sangria(1)}<listaInvernaderos>"
+            vacio = False
+        yield from simulador.iter_xml_salida()
+    if vacio:
+        yield f"{sangria(1)}<listaInvernaderos />{sangria(0)}</datosSalida>"
+    else:
+        yield f"{sangria(1)}</listaInvernaderos>{sangria(0)}</datosSalida>"
+
+def escribir_salida_xml(ruta, simuladores):
+    # Mismo modo de apertura que ET.write para conservar los bytes exactos
+    with open(ruta, 'w', encoding='utf-8', errors='xmlcharrefreplace') as archivo:
+        for fragmento in iter_salida_xml(simuladores):
+            archivo.write(fragmento)
+
+class _Eco:
+    # csv.writer escribe aquí y writerow devuelve la fila ya formateada
+    def write(self, valor):
+        return valor
+
+def iter_instrucciones_ndjson(instrucciones):
+    # Una línea JSON por segundo: {"tiempo": t, "acciones": {dron: accion}}
+    for tiempo, acciones in instrucciones:
+        yield json.dumps({'tiempo': tiempo, 'acciones': acciones}, ensure_ascii=False) + "\n"
+
+def iter_instrucciones_csv(nombres, instrucciones):
+    # Encabezado tiempo + un dron por columna, luego una fila por segundo
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(['tiempo'] + list(nombres))
+    for tiempo, acciones in instrucciones:
+        yield escritor.writerow([tiempo] + [acciones.get(nombre, 'Esperar') for nombre in nombres])
@@ -1,237 +1,223 @@
-from .tda import ListaEnlazada
-from graphviz import Digraph
+from .motor import MotorRiego
+from .historial import HistorialTDA
+from .salida import atributo, sangria
+from .dron import EstadoDron
+from .metricas import logger, metricas
+from .graficos import digraph_estado
 import xml.etree.ElementTree as ET
+import logging
+import os
+
+_plantilla_reporte = None
+
+def plantilla_reporte():
+    # templates/reporte.html compilada una sola vez, para usar el reporte
+    # fuera de la app; la app la carga desde su propio entorno de Jinja
+    global _plantilla_reporte
+    if _plantilla_reporte is None:
+        from jinja2 import Environment, FileSystemLoader, select_autoescape
+        carpeta = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+        entorno = Environment(loader=FileSystemLoader(carpeta), autoescape=select_autoescape(['html']))
+        _plantilla_reporte = entorno.get_template('reporte.html')
+    return _plantilla_reporte
 
 class Simulador:
+    INTERVALO_PROGRESO = 1024
+
     def __init__(self, invernadero, plan):
         self.invernadero = invernadero
         self.plan = plan
         self.tiempo_total = 0
-        self.instrucciones_por_tiempo = ListaEnlazada()
         self.estadisticas = None
-        self.historial_tda = []
-
-    def simular(self):
-        # Reiniciar drones - Asegurar que empiezan en posición 0
-        for dron in self.invernadero.drones:
-            dron.reset()
-            dron.posicion_actual = 0  # Forzar posición inicial
-
-        # Mapeo hilera -> dron
-        hilera_a_dron = {}
-        for hilera, dron_id in self.invernadero.asignaciones.items():
-            for dron in self.invernadero.drones:
-                if dron.id_dron == dron_id:
-                    hilera_a_dron[hilera] = dron
-                    dron.hilera_asignada = hilera
-                    break
-
-        plantas_plan = [p for p in self.plan.secuencia_plantas]
-        indice_plan = 0
-        tiempo = 1
-        drones_finalizados = set()
-        max_iteraciones = 100
-
-        print(f"=== SIMULANDO {self.plan.nombre} ===")
-        print(f"Plantas en plan: {len(plantas_plan)}")
-        for i, planta in enumerate(plantas_plan):
-            print(f"  {i+1}. H{planta.hilera}-P{planta.posicion}")
-
-        while (indice_plan < len(plantas_plan) or len(drones_finalizados) < len(self.invernadero.drones)) and tiempo <= max_iteraciones:
-            acciones = {d.nombre: "Esperar" for d in self.invernadero.drones}
-            riego_realizado = False
-
-            # MOVIMIENTO: Todos los drones se mueven simultáneamente hacia sus objetivos
-            for dron in self.invernadero.drones:
-                if dron.nombre in drones_finalizados:
-                    continue
-                    
-                # Encontrar la próxima planta para este dron
-                planta_objetivo = None
-                for i in range(indice_plan, len(plantas_plan)):
-                    planta = plantas_plan[i]
-                    if planta.hilera == dron.hilera_asignada:
-                        planta_objetivo = planta
-                        break
-                
-                if planta_objetivo:
-                    # Mover hacia la planta objetivo
-                    if dron.posicion_actual < planta_objetivo.posicion:
-                        dron.posicion_actual += 1
-                        acciones[dron.nombre] = f"Adelante(H{planta_objetivo.hilera}P{dron.posicion_actual})"
-                    elif dron.posicion_actual > planta_objetivo.posicion:
-                        dron.posicion_actual -= 1
-                        acciones[dron.nombre] = f"Atrás(H{planta_objetivo.hilera}P{dron.posicion_actual})"
-
-            # RIEGO: Solo una planta por ciclo, en el orden del plan
-            if indice_plan < len(plantas_plan) and not riego_realizado:
-                planta_actual = plantas_plan[indice_plan]
-                dron_actual = hilera_a_dron.get(planta_actual.hilera)
-                
-                if dron_actual and dron_actual.posicion_actual == planta_actual.posicion:
-                    # Riego exclusivo - sobrescribir todas las acciones
-                    acciones = {d.nombre: "Esperar" for d in self.invernadero.drones}
-                    acciones[dron_actual.nombre] = "Regar"
-                    dron_actual.regar_planta(planta_actual)
-                    riego_realizado = True
-                    indice_plan += 1
-                    print(f"Tiempo {tiempo}: {dron_actual.nombre} riega H{planta_actual.hilera}-P{planta_actual.posicion}")
-
-            # REGRESO AL INICIO: Drones sin más plantas
-            for dron in self.invernadero.drones:
-                if dron.nombre in drones_finalizados:
-                    continue
-                    
-                # Verificar si tiene más plantas en el plan
-                tiene_mas_plantas = False
-                for i in range(indice_plan, len(plantas_plan)):
-                    planta = plantas_plan[i]
-                    if planta.hilera == dron.hilera_asignada:
-                        tiene_mas_plantas = True
-                        break
-                
-                if not tiene_mas_plantas and dron.posicion_actual > 0:
-                    # Solo regresar si no está haciendo otra acción
-                    if acciones[dron.nombre] == "Esperar":
-                        dron.posicion_actual -= 1
-                        if dron.posicion_actual > 0:
-                            acciones[dron.nombre] = f"Atrás(H{dron.hilera_asignada}P{dron.posicion_actual})"
-                        else:
-                            acciones[dron.nombre] = "FIN"
-                            drones_finalizados.add(dron.nombre)
-                            print(f"Tiempo {tiempo}: {dron.nombre} finaliza")
-
-            # Debug: mostrar estado actual
-            if tiempo <= 10:  # Solo mostrar primeros 10 tiempos para no saturar
-                print(f"T{tiempo}: {acciones}")
-
-            self._guardar_estado(tiempo, acciones)
-            tiempo += 1
-
-        # Si se alcanzó el límite, forzar finalización
-        if tiempo > max_iteraciones:
-            print(f"ADVERTENCIA: Se alcanzó el límite de {max_iteraciones} iteraciones")
-            # Forzar finalización de todos los drones
-            for dron in self.invernadero.drones:
-                if dron.nombre not in drones_finalizados:
-                    acciones[dron.nombre] = "FIN"
-            self._guardar_estado(tiempo, acciones)
-
-        self.tiempo_total = tiempo - 1
+        self.historial = HistorialTDA([])
+        self.estados_drones = []
+        self._motor = None  # Se conserva para resimular ediciones del plan
+
+    @property
+    def instrucciones_por_tiempo(self):
+        # Se itera como antes: {'tiempo': t, 'acciones': {dron: accion}}
+        return self.historial
+
+    def simular(self, progreso=None):
+        # progreso(ticks_hechos, ticks_totales, plantas_regadas, plantas_totales)
+        # se llama cada INTERVALO_PROGRESO segundos simulados y al terminar
+        with metricas.medir('simulacion'):
+            self._simular(progreso)
+        metricas.incrementar('simulaciones')
+        metricas.incrementar('ticks', self.tiempo_total)
+        metricas.incrementar('plantas_regadas', sum(len(e.plantas_regadas) for e in self.estados_drones))
+        metricas.incrementar('drones', len(self.estados_drones))
+
+    def calcular_estadisticas(self):
+        """Tiempo total, agua y fertilizante sin generar las instrucciones.
+
+        Usa solo los eventos de riego del motor, así que cuesta lo
+        proporcional al largo del plan; el historial queda vacío.
+        """
+        with metricas.medir('estadisticas'):
+            motor = MotorRiego(self.invernadero, self.plan)
+            self._regar(motor, logger.isEnabledFor(logging.DEBUG))
+            self.historial = HistorialTDA(d.nombre for d in motor.drones)
+            self._cerrar(motor)
+        metricas.incrementar('estadisticas_rapidas')
+
+    def resimular(self, plan):
+        """Simula plan, una edición del plan de esta simulación.
+
+        El motor retoma desde el último punto de control anterior a la
+        primera planta cambiada y el historial conserva los segundos que
+        no dependen de la edición, así que el costo es proporcional a lo
+        que cambia. Sin una simulación previa se simula completo.
+        """
+        nuevo = Simulador(self.invernadero, plan)
+        if self._motor is None or len(self.historial) != self.tiempo_total:
+            nuevo.simular()
+            return nuevo
+        with metricas.medir('resimulacion'):
+            motor = MotorRiego(self.invernadero, plan, base=self._motor)
+            nuevo._regar(motor, logger.isEnabledFor(logging.DEBUG), base=self)
+            desde = motor.tiempo_conservado
+            nuevo.historial = self.historial.copiar_hasta(desde)
+            for tiempo, acciones, posiciones, estados in motor.ticks(desde + 1):
+                nuevo.historial.agregar(acciones, posiciones, estados)
+            nuevo._cerrar(motor)
+            nuevo._motor = motor
+        metricas.incrementar('resimulaciones')
+        metricas.incrementar('ticks', nuevo.tiempo_total - desde)
+        logger.debug("Resimulación %s: desde planta %d y segundo %d",
+                     plan.nombre, motor.reanudado_desde, desde)
+        return nuevo
+
+    def _simular(self, progreso):
+        motor = MotorRiego(self.invernadero, self.plan)
+        depurar = logger.isEnabledFor(logging.DEBUG)
+
+        if depurar:
+            logger.debug("Simulando %s: %d plantas en plan", self.plan.nombre, len(motor.plantas))
+            for i, planta in enumerate(motor.plantas):
+                logger.debug("  %d. H%s-P%s", i + 1, planta.hilera, planta.posicion)
+        self._regar(motor, depurar)
+
+        self.historial = HistorialTDA(d.nombre for d in motor.drones)
+        regadas = 0
+        for tiempo, acciones, posiciones, estados in motor.ticks():
+            if depurar and tiempo <= 10:  # Solo los primeros 10 tiempos para no saturar
+                logger.debug("T%d: %s", tiempo, acciones)
+            self.historial.agregar(acciones, posiciones, estados)
+            if progreso and tiempo % self.INTERVALO_PROGRESO == 0:
+                while regadas < len(motor.eventos) and motor.eventos[regadas][0] <= tiempo:
+                    regadas += 1
+                progreso(tiempo, motor.tiempo_total, regadas, len(motor.eventos))
+        if progreso:
+            progreso(motor.tiempo_total, motor.tiempo_total, len(motor.eventos), len(motor.eventos))
+
+        self._cerrar(motor)
+        self._motor = motor
+        logger.info("Simulación %s / %s: %d s, %sL agua, %sg fertilizante",
+                    self.invernadero.nombre, self.plan.nombre, self.tiempo_total,
+                    self.estadisticas['agua_total'], self.estadisticas['fertilizante_total'])
+        if depurar:
+            for nombre, agua, fert in self.estadisticas['drones']:
+                logger.debug("  %s: %sL, %sg", nombre, agua, fert)
+
+    def _regar(self, motor, depurar, base=None):
+        # Estado propio de esta corrida: el modelo del invernadero no se modifica
+        self.estados_drones = [EstadoDron(d) for d in motor.drones]
+        eventos = motor.eventos
+        if base is not None and motor.punto_inicial is not None:
+            # Los riegos anteriores al punto de control se toman de base
+            _, _, _, _, conteos, agua, fertilizante = motor.punto_inicial
+            for i, estado in enumerate(self.estados_drones):
+                previo = base.estados_drones[i]
+                estado.plantas_regadas = previo.plantas_regadas[:conteos[i]]
+                estado.agua_usada = agua[i]
+                estado.fertilizante_usado = fertilizante[i]
+                if conteos[i]:
+                    estado.estado = "Regando"
+            eventos = eventos[motor.reanudado_desde:]
+        # Riegos en el orden del plan, ya con su tiempo calculado
+        for tiempo, i, planta in eventos:
+            dron = self.estados_drones[i]
+            dron.regar_planta(planta)
+            if depurar:
+                logger.debug("Tiempo %d: %s riega H%s-P%s", tiempo, dron.nombre, planta.hilera, planta.posicion)
+
+    def _cerrar(self, motor):
+        self.tiempo_total = motor.tiempo_total
+        por_nombre = {e.nombre: e for e in self.estados_drones}
+        estados = [por_nombre[d.nombre] for d in self.invernadero.drones]
         self.estadisticas = {
-            'agua_total': sum(d.agua_usada for d in self.invernadero.drones),
-            'fertilizante_total': sum(d.fertilizante_usado for d in self.invernadero.drones),
-            'drones': [(d.nombre, d.agua_usada, d.fertilizante_usado) for d in self.invernadero.drones]
+            'agua_total': sum(e.agua_usada for e in estados),
+            'fertilizante_total': sum(e.fertilizante_usado for e in estados),
+            'drones': [(e.nombre, e.agua_usada, e.fertilizante_usado) for e in estados]
+        }
+
+    def flujo_instrucciones(self):
+        """Devuelve (nombres de drones, iterador de (tiempo, acciones)).
+
+        Con historial se recorre el guardado; si no, las acciones salen del
+        motor a medida que se generan y no se guardan, así que la memoria
+        no crece con el largo de la simulación.
+        """
+        if len(self.historial):
+            historial = self.historial
+            return historial.nombres, ((t, historial.acciones(t)) for t in range(1, len(historial) + 1))
+        motor = MotorRiego(self.invernadero, self.plan)
+        return [d.nombre for d in motor.drones], ((t, acciones) for t, acciones, _, _ in motor.ticks())
+
+    def resultado(self):
+        return {
+            'tiempo_total': self.tiempo_total,
+            'estadisticas': self.estadisticas,
+            'historial': self.historial,
         }
-        
-        print(f"=== FIN SIMULACIÓN {self.plan.nombre} ===")
-        print(f"Tiempo total: {self.tiempo_total} segundos")
-        print(f"Agua total: {self.estadisticas['agua_total']}L")
-        print(f"Fertilizante total: {self.estadisticas['fertilizante_total']}g")
-        for nombre, agua, fert in self.estadisticas['drones']:
-            print(f"  {nombre}: {agua}L, {fert}g")
-
-    def _guardar_estado(self, tiempo, acciones):
-        self.instrucciones_por_tiempo.agregar({
-            'tiempo': tiempo,
-            'acciones': acciones.copy()
-        })
-        self.historial_tda.append({
-            'tiempo': tiempo,
-            'acciones': acciones.copy(),
-            'drones': [(d.nombre, d.posicion_actual, d.estado) for d in self.invernadero.drones]
-        })
+
+    @classmethod
+    def desde_resultado(cls, invernadero, plan, resultado):
+        simulador = cls(invernadero, plan)
+        simulador.tiempo_total = resultado['tiempo_total']
+        simulador.estadisticas = resultado['estadisticas']
+        simulador.historial = resultado['historial']
+        return simulador
 
     def generar_grafico_tda(self, t):
-        dot = Digraph(comment=f'Estado de TDAs en tiempo t={t}')
-        dot.attr(rankdir='LR', fontname='Arial', fontsize='12')
-        dot.node('plan', 'Plan de Riego', shape='ellipse', style='filled', color='lightblue')
-
-        estado = None
-        for e in self.historial_tda:
-            if e['tiempo'] == t:
-                estado = e
-                break
-
-        if not estado:
-            dot.node('error', f'No hay estado para t={t}', shape='box', style='filled', color='lightcoral')
-            return dot.pipe(format='svg').decode('utf-8')
-
-        for nombre, pos, estado_dron in estado['drones']:
-            dron_id = f'dron_{nombre}'
-            dot.node(dron_id, f'{nombre}\\nPos: {pos}\\nEstado: {estado_dron}', 
-                    shape='box', style='filled', color='lightskyblue')
-            dot.edge('plan', dron_id)
-            
-            accion = estado['acciones'].get(nombre, 'Esperar')
-            accion_id = f'accion_{nombre}_{t}'
-            dot.node(accion_id, accion, shape='box', style='filled', color='lightpink')
-            dot.edge(dron_id, accion_id)
+        with metricas.medir('grafico'):
+            return self._generar_grafico_tda(t)
 
+    def _generar_grafico_tda(self, t):
+        dot = digraph_estado(self.historial.estado(t), t)
         return dot.pipe(format='svg').decode('utf-8')
 
     def generar_reporte_html(self):
-        from jinja2 import Template
-        template_str = """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Reporte - {{ invernadero }}</title>
-            <style>
-                table { border-collapse: collapse; width: 100%; }
-                th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
-                th { background-color: #f2f2f2; }
-                tr:nth-child(even) { background-color: #f9f9f9; }
-            </style>
-        </head>
-        <body>
-        <h1>Reporte: {{ invernadero }}</h1>
-        <h2>Plan: {{ plan }}</h2>
-        <p><strong>Tiempo óptimo:</strong> {{ tiempo }} segundos</p>
-        <p><strong>Agua total:</strong> {{ agua_total }} litros</p>
-        <p><strong>Fertilizante total:</strong> {{ fertilizante_total }} gramos</p>
-        
-        <h3>Estadísticas por dron:</h3>
-        <table>
-            <tr><th>Dron</th><th>Agua (L)</th><th>Fertilizante (g)</th></tr>
-            {% for nombre, agua, fert in drones %}
-            <tr>
-                <td>{{ nombre }}</td>
-                <td>{{ agua }}</td>
-                <td>{{ fert }}</td>
-            </tr>
-            {% endfor %}
-        </table>
-
-        <h3>Instrucciones por tiempo:</h3>
-        <table>
-            <tr>
-                <th>Tiempo (s)</th>
-                {% for dron in drones %}
-                    <th>{{ dron[0] }}</th>
-                {% endfor %}
-            </tr>
-            {% for inst in instrucciones %}
-            <tr>
-                <td>{{ inst.tiempo }}</td>
-                {% for dron in drones %}
-                    <td>{{ inst.acciones.get(dron[0], 'Esperar') }}</td>
-                {% endfor %}
-            </tr>
-            {% endfor %}
-        </table>
-        </body>
-        </html>
-        """
-        template = Template(template_str)
-        return template.render(
+        return "".join(self.iter_reporte_html())
+
+    def paginas_reporte(self, filas_por_pagina=None):
+        if not filas_por_pagina:
+            return 1
+        return max(1, -(-len(self.historial) // filas_por_pagina))
+
+    def iter_reporte_html(self, pagina=1, filas_por_pagina=None, enlace=None, plantilla=None):
+        # Renderiza el reporte por partes para escribirlo sin armarlo completo.
+        # Con filas_por_pagina solo van las instrucciones de esa página y
+        # enlace(n) da la dirección de la página n
+        if plantilla is None:
+            plantilla = plantilla_reporte()
+        if filas_por_pagina:
+            desde = (pagina - 1) * filas_por_pagina + 1
+            instrucciones = self.historial.rango(desde, desde + filas_por_pagina - 1)
+        else:
+            instrucciones = self.instrucciones_por_tiempo
+        return plantilla.generate(
             invernadero=self.invernadero.nombre,
             plan=self.plan.nombre,
             tiempo=self.tiempo_total,
             agua_total=self.estadisticas['agua_total'],
             fertilizante_total=self.estadisticas['fertilizante_total'],
             drones=self.estadisticas['drones'],
-            instrucciones=list(self.instrucciones_por_tiempo)
+            instrucciones=instrucciones,
+            pagina=pagina,
+            paginas=self.paginas_reporte(filas_por_pagina),
+            enlace=enlace,
         )
 
     def generar_xml_salida(self, root_lista_invernaderos):
@@ -260,4 +246,42 @@ class Simulador:
             for dron_nombre, accion in inst['acciones'].items():
                 dron_inst = ET.SubElement(tiempo_elem, "dron")
                 dron_inst.set("nombre", dron_nombre)
-                dron_inst.set("accion", accion)
\ No newline at end of file
+                dron_inst.set("accion", accion)
+
+    def iter_xml_salida(self):
+        # Mismo bloque <invernadero> que generar_xml_salida + ET.indent,
+        # escrito tiempo por tiempo sin construir el árbol
+        yield f'{sangria(2)}<invernadero nombre="{atributo(self.invernadero.nombre)}">'
+        yield f'{sangria(3)}<listaPlanes>{sangria(4)}<plan nombre="{atributo(self.plan.nombre)}">'
+        yield f"{sangria(5)}<tiempoOptimoSegundos>{self.tiempo_total}</tiempoOptimoSegundos>"
+        yield f"{sangria(5)}<aguaRequeridaLitros>{int(self.estadisticas['agua_total'])}</aguaRequeridaLitros>"
+        yield f"{sangria(5)}<fertilizanteRequeridoGramos>{int(self.estadisticas['fertilizante_total'])}</fertilizanteRequeridoGramos>"
+
+        if self.estadisticas['drones']:
+            yield f"{sangria(5)}<eficienciaDronesRegadores>"
+            for nombre, agua, fert in self.estadisticas['drones']:
+                yield (f'{sangria(6)}<dron nombre="{atributo(nombre)}" litrosAgua="{int(agua)}" '
+                       f'gramosFertilizante="{int(fert)}" />')
+            yield f"{sangria(5)}</eficienciaDronesRegadores>"
+        else:
+            yield f"{sangria(5)}<eficienciaDronesRegadores />"
+
+        if len(self.instrucciones_por_tiempo):
+            yield f"{sangria(5)}<instrucciones>"
+            nombres = {}
+            for inst in self.instrucciones_por_tiempo:
+                partes = [f'{sangria(6)}<tiempo segundos="{inst["tiempo"]}"']
+                if inst['acciones']:
+                    partes.append(">")
+                    for dron_nombre, accion in inst['acciones'].items():
+                        if dron_nombre not in nombres:
+                            nombres[dron_nombre] = atributo(dron_nombre)
+                        partes.append(f'{sangria(7)}<dron nombre="{nombres[dron_nombre]}" accion="{atributo(accion)}" />')
+                    partes.append(f"{sangria(6)}</tiempo>")
+                else:
+                    partes.append(" />")
+                yield "".join(partes)
+            yield f"{sangria(5)}</instrucciones>"
+        else:
+            yield f"{sangria(5)}<instrucciones />"
+        yield f"{sangria(4)}</plan>{sangria(3)}</listaPlanes>{sangria(2)}</invernadero>"
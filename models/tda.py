@@ -1,4 +1,6 @@
 class Nodo:
+    __slots__ = ('dato', 'siguiente')
+
     def __init__(self, dato):
         self.dato = dato
         self.siguiente = None
@@ -6,26 +8,23 @@ class Nodo:
 class ListaEnlazada:
     def __init__(self):
         self.cabeza = None
-        self._tamano = 0
+        self.cola = None
+        # Arreglo de nodos para acceso por indice en O(1)
+        self._nodos = []
 
     def agregar(self, dato):
         nuevo = Nodo(dato)
         if not self.cabeza:
             self.cabeza = nuevo
         else:
-            actual = self.cabeza
-            while actual.siguiente:
-                actual = actual.siguiente
-            actual.siguiente = nuevo
-        self._tamano += 1
+            self.cola.siguiente = nuevo
+        self.cola = nuevo
+        self._nodos.append(nuevo)
 
     def obtener(self, i):
-        if i < 0 or i >= self._tamano:
+        if i < 0 or i >= len(self._nodos):
             return None
-        actual = self.cabeza
-        for _ in range(i):
-            actual = actual.siguiente
-        return actual.dato
+        return self._nodos[i].dato
 
     def __iter__(self):
         actual = self.cabeza
@@ -34,8 +33,18 @@ class ListaEnlazada:
             actual = actual.siguiente
 
     def __len__(self):
-        return self._tamano
+        return len(self._nodos)
 
     @property
     def tamano(self):
-        return self._tamano
\ No newline at end of file
+        return len(self._nodos)
+
+    def __getstate__(self):
+        # Se serializa como arreglo plano: recorrer la cadena con pickle
+        # agotaria la recursion en listas largas
+        return (list(self),)
+
+    def __setstate__(self, estado):
+        self.__init__()
+        for dato in estado[0]:
+            self.agregar(dato)
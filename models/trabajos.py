@@ -0,0 +1,114 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import CacheSimulaciones
+from .simulador import Simulador
+
+class Trabajo:
+    # Al terminar solo se guardan nombres y el resumen; la simulación completa
+    # queda en la cache y el invernadero y el plan se sueltan
+    def __init__(self, clave, invernadero, plan):
+        self.id = uuid.uuid4().hex
+        self.clave = clave
+        self.invernadero = invernadero
+        self.plan = plan
+        self.nombre_invernadero = invernadero.nombre
+        self.nombre_plan = plan.nombre
+        self.estado = "pendiente"  # pendiente -> en_curso -> terminado | error
+        self.ticks_hechos = 0
+        self.ticks_totales = None
+        self.plantas_regadas = 0
+        self.plantas_totales = len(plan.secuencia_plantas)
+        self.resultado = None
+        self.error = None
+
+    def actualizar(self, ticks_hechos, ticks_totales, plantas_regadas, plantas_totales):
+        self.ticks_hechos = ticks_hechos
+        self.ticks_totales = ticks_totales
+        self.plantas_regadas = plantas_regadas
+        self.plantas_totales = plantas_totales
+
+    def terminar(self, resultado):
+        self.resultado = {'tiempo_total': resultado['tiempo_total'],
+                          'estadisticas': resultado['estadisticas']}
+        self.invernadero = self.plan = None
+        self.estado = "terminado"
+
+    def como_dict(self):
+        return {
+            'id': self.id,
+            'invernadero': self.nombre_invernadero,
+            'plan': self.nombre_plan,
+            'estado': self.estado,
+            'ticks_hechos': self.ticks_hechos,
+            'ticks_totales': self.ticks_totales,
+            'plantas_regadas': self.plantas_regadas,
+            'plantas_totales': self.plantas_totales,
+            'error': self.error,
+        }
+
+class ColaTrabajos:
+    """Simulaciones en segundo plano sobre un pool de hilos local.
+
+    Un trabajo igual (misma clave de contenido) a uno pendiente o en curso
+    devuelve ese mismo trabajo; si el resultado ya está en la cache el
+    trabajo nace terminado. Se conservan los últimos max_terminados.
+    """
+
+    def __init__(self, cache, trabajadores=2, max_terminados=256):
+        self.cache = cache
+        self.max_terminados = max_terminados
+        self._pool = ThreadPoolExecutor(max_workers=trabajadores, thread_name_prefix="simulacion")
+        self._trabajos = OrderedDict()  # id -> Trabajo
+        self._activos = {}  # clave -> Trabajo pendiente o en curso
+        self._lock = threading.Lock()
+
+    def enviar(self, invernadero, plan):
+        clave = CacheSimulaciones.clave(invernadero, plan)
+        with self._lock:
+            activo = self._activos.get(clave)
+            if activo is not None:
+                return activo
+            trabajo = Trabajo(clave, invernadero, plan)
+            self._trabajos[trabajo.id] = trabajo
+            self._descartar_terminados()
+            resultado = self.cache.obtener(clave)
+            if resultado is not None:
+                trabajo.actualizar(resultado['tiempo_total'], resultado['tiempo_total'],
+                                   trabajo.plantas_totales, trabajo.plantas_totales)
+                trabajo.terminar(resultado)
+                return trabajo
+            self._activos[clave] = trabajo
+        self._pool.submit(self._ejecutar, trabajo)
+        return trabajo
+
+    def obtener(self, trabajo_id):
+        with self._lock:
+            return self._trabajos.get(trabajo_id)
+
+    def _ejecutar(self, trabajo):
+        trabajo.estado = "en_curso"
+        try:
+            simulador = Simulador(trabajo.invernadero, trabajo.plan)
+            simulador.simular(progreso=trabajo.actualizar)
+            resultado = simulador.resultado()
+            self.cache.guardar(trabajo.clave, resultado)
+            trabajo.terminar(resultado)
+        except Exception as e:
+            trabajo.error = str(e)
+            trabajo.invernadero = trabajo.plan = None
+            trabajo.estado = "error"
+        finally:
+            with self._lock:
+                self._activos.pop(trabajo.clave, None)
+
+    def _descartar_terminados(self):
+        while len(self._trabajos) > self.max_terminados + len(self._activos):
+            for trabajo_id, trabajo in self._trabajos.items():
+                if trabajo.estado in ("terminado", "error"):
+                    del self._trabajos[trabajo_id]
+                    break
+            else:
+                return